@@ -2,4 +2,6 @@
 
 from . import models
 from . import controllers
+from . import report
+from . import populate
 
@@ -41,10 +41,21 @@ Technical Details:
         'views/event_templates.xml',
         'views/website_sale_templates.xml',
         'views/portal_templates.xml',
+        'views/event_ticket_store_instrumentation_views.xml',
+        'views/event_ticket_store_box_office_views.xml',
+        'views/event_ticket_store_provisioning_views.xml',
+        'report/event_ticket_store_sale_report_views.xml',
+        'data/product_attribute_data.xml',
         'data/mail_template_data.xml',
         'data/ir_cron_data.xml',
         'security/ir.model.access.csv',
     ],
+    'assets': {
+        'web.assets_frontend': [
+            'website_event_ticket_store/static/src/js/event_ticket_seats.js',
+            'website_event_ticket_store/static/src/js/event_ticket_variants.js',
+        ],
+    },
     'test': [
         'tests/test_event_ticket_store.py',
     ],
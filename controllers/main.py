@@ -1,22 +1,86 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
+import time
+from datetime import timezone
+
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import http_date
+
 from odoo import http, fields, _
 from odoo.exceptions import ValidationError, AccessError
 from odoo.http import request
 from odoo.addons.website_sale.controllers.main import WebsiteSale
+from odoo.addons.website_event.controllers.main import WebsiteEventController
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+from odoo.addons.website_event_ticket_store.tools import access_tokens, metrics
+from odoo.addons.website_event_ticket_store.tools.instrumentation import instrumented_route, store_span
+from odoo.addons.website_event_ticket_store.tools.profiling import profiled_route
+from odoo.addons.website_event_ticket_store.tools.streaming_export import (
+    csv_chunks,
+    ics_chunks,
+    rows_in_new_cursor,
+    xlsx_chunks,
+)
 
 
 class WebsiteEventTicketStore(WebsiteSale):
     """Extend website sale to handle event ticket attendee data"""
 
+    # Maximum number of tickets returned by a single seat status request
+    SEAT_STATUS_BATCH_LIMIT = 100
+    # Seconds during which browsers and proxies may reuse a seat status response
+    SEAT_STATUS_MAX_AGE = 10
+    # Number of product templates serialized per batch by the event catalog
+    EVENT_CATALOG_BATCH_SIZE = 200
+
     def _check_cart_and_addresses(self, order_sudo):
         """Allow checkout to proceed without attendee collection - now handled after payment"""
-        # Simply call parent method without redirecting to attendee collection
+        # Send the customer back to the cart when event tickets are no longer available
+        event_errors = order_sudo._get_event_checkout_errors()
+        if event_errors:
+            for line, error in event_errors.items():
+                line.shop_warning = error
+            return request.redirect('/shop/cart')
         return super()._check_cart_and_addresses(order_sudo)
 
+    def _get_shop_payment_errors(self, order):
+        """Block payment while an event line can no longer be bought
+
+        Orders already paid are not checked again: seats may sell out between
+        the payment and the return to /shop/payment/validate, and the paid
+        order must still reach its confirmation and attendee details step.
+        """
+        errors = super()._get_shop_payment_errors(order)
+        if order and not order.transaction_ids.filtered(lambda tx: tx.state in ('authorized', 'done')):
+            for error in order._get_event_checkout_errors().values():
+                errors.append((_("Event tickets unavailable"), error))
+        return errors
+
+    def _get_event_facets(self, post):
+        """Return the event facets of the shop request parameters"""
+        event_id = post.get('event_id')
+        return {
+            'event_date': post.get('event_date') or None,
+            'event_available': bool(post.get('event_available')),
+            'event_id': int(event_id) if event_id and str(event_id).isdigit() else None,
+        }
+
+    def _get_search_options(self, **post):
+        """Pass the event facets to product.template._search_get_detail"""
+        options = super()._get_search_options(**post)
+        options.update(self._get_event_facets(post))
+        return options
+
+    def _shop_get_query_url_kwargs(self, *args, **post):
+        """Keep the event facets in the shop links and pager"""
+        kwargs = super()._shop_get_query_url_kwargs(*args, **post)
+        kwargs.update(self._get_event_facets(post))
+        return kwargs
+
     @http.route(['/shop/product/<model("product.template"):product>'], type='http', auth="public", website=True)
+    @profiled_route('product')
     def product(self, product, category='', search='', **kwargs):
         """Override product page to add event information"""
         result = super().product(product, category, search, **kwargs)
@@ -35,25 +99,187 @@ class WebsiteEventTicketStore(WebsiteSale):
         if not product.event_id:
             return None
 
-        # Get the first variant that has an event ticket
-        variant = product.product_variant_ids.filtered('event_ticket_id')[:1]
-        if not variant:
+        snapshot = product._get_event_snapshot()
+        if not snapshot:
             return None
 
-        return {
-            'event_name': product.event_id.name,
-            'event_date_begin': product.event_id.date_begin,
-            'event_date_end': product.event_id.date_end,
-            'ticket_name': variant.event_ticket_id.name,
-            'ticket_price': variant.event_ticket_id.price,
-            'ticket_price_reduce': variant.event_ticket_id.price_reduce,
-            'seats_available': variant.event_ticket_id.seats_available if variant.event_ticket_id.seats_limited else None,
-            'seats_limited': variant.event_ticket_id.seats_limited,
-            'ticket_description': variant.event_ticket_id.description or '',
-            'is_available': product._is_event_ticket_available(),
-        }
+        # Per variant figures, the first variant alone says nothing of the others
+        variants = product._get_event_availability_matrix(request.website._get_current_pricelist())[product.id]
+        return dict(
+            snapshot.as_event_info(),
+            is_available=any(entry['is_available'] for entry in variants),
+            variants=variants,
+        )
+
+    @http.route(['/shop/event_ticket/seats'], type='http', auth="public", methods=['GET'], website=True, sitemap=False)
+    @profiled_route('event_ticket_seats')
+    def event_ticket_seats(self, ticket_ids='', **kw):
+        """Return live seat counts and availability for a batch of ticket ids
+
+        Pages embedding seat counts can be cached aggressively and refresh the
+        volatile numbers client-side through this endpoint.
+        """
+        ids = []
+        for ticket_id in ticket_ids.split(','):
+            if ticket_id.strip().isdigit():
+                ids.append(int(ticket_id))
+        ids = list(dict.fromkeys(ids))[:self.SEAT_STATUS_BATCH_LIMIT]
+
+        tickets = request.env['event.event.ticket'].sudo().browse(ids).exists()
+        # Only expose tickets of published events
+        tickets = tickets.filtered(lambda ticket: ticket.event_id.website_published)
+
+        return request.make_json_response(
+            {'tickets': tickets._get_store_seat_status()},
+            headers=[('Cache-Control', f'public, max-age={self.SEAT_STATUS_MAX_AGE}')],
+        )
+
+    @http.route(['/shop/event_catalog'], type='http', auth="public", methods=['GET'], website=True, sitemap=False)
+    @profiled_route('event_catalog')
+    def event_catalog(self, since=None, **kw):
+        """Read-only JSON catalog of the published event products
+
+        Supports conditional requests through ETag / If-None-Match and an
+        incremental ``since`` cursor: only products whose template, variants,
+        event or tickets were written after it, or whose availability changed
+        since, are returned. Clients pass the ``next_since`` value of a
+        response as ``since`` on their next call.
+        Products archived, unpublished or no longer sold since the cursor are
+        listed by id in ``removed``. Deleted products leave no trace, so
+        clients detect them with a periodic full read without ``since``.
+        """
+        try:
+            since_dt = fields.Datetime.to_datetime(since) if since else None
+        except ValueError:
+            raise BadRequest(_("Invalid since cursor: %s", since))
+        domain = self._get_event_catalog_domain(since_dt)
+        Template = request.env['product.template'].sudo()
+        removed = self._get_event_catalog_removed(since_dt)
+
+        next_since, etag = self._get_event_catalog_version(domain, since, removed)
+        headers = [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('ETag', '"%s"' % etag),
+            ('Cache-Control', 'public, no-cache'),
+        ]
+        if request.httprequest.if_none_match.contains(etag):
+            return request.make_response('', headers=headers, status=304)
+
+        template_ids = Template.search(domain, order='id').ids
+        header = json.dumps({
+            'since': since or None,
+            'next_since': next_since,
+            'removed': removed.ids,
+        })[:-1] + ', "products": ['
+
+        # The response is consumed after the request cursor is closed
+        chunks = rows_in_new_cursor(
+            request.env.cr.dbname, request.env.uid, dict(request.env.context),
+            lambda env: self._iter_event_catalog_chunks(env, template_ids, header),
+        )
+        return request.make_response(chunks, headers=headers)
+
+    def _iter_event_catalog_chunks(self, env, template_ids, header):
+        """Yield the catalog JSON, serializing the templates in batches
+
+        The record cache is dropped between batches, so the memory footprint
+        depends on the batch size, not on the catalog size.
+        """
+        Template = env['product.template'].sudo()
+        yield header
+        for start in range(0, len(template_ids), self.EVENT_CATALOG_BATCH_SIZE):
+            batch = Template.browse(template_ids[start:start + self.EVENT_CATALOG_BATCH_SIZE])
+            entries = batch._get_event_catalog_entries()
+            yield (',' if start else '') + ','.join(json.dumps(entry) for entry in entries)
+            env.invalidate_all()
+        yield ']}'
+
+    def _get_event_catalog_domain(self, since_dt=None):
+        """Domain of the product templates exposed by the event catalog"""
+        domain = [
+            ('service_tracking', '=', 'event'),
+            ('sale_ok', '=', True),
+            ('website_published', '=', True),
+            ('event_id', '!=', False),
+        ] + request.website.website_domain()
+        if since_dt:
+            now = fields.Datetime.now()
+            domain += [
+                '|', '|', '|',
+                ('write_date', '>', since_dt),
+                ('product_variant_ids.write_date', '>', since_dt),
+                ('event_id.write_date', '>', since_dt),
+                ('product_variant_ids.event_ticket_id', 'any', [
+                    '|', '|', '|', '|',
+                    ('write_date', '>', since_dt),
+                    # Seats taken or released
+                    ('registration_ids.write_date', '>', since_dt),
+                    # Sale windows and events that opened or closed without a write
+                    '&', ('start_sale_datetime', '>', since_dt), ('start_sale_datetime', '<=', now),
+                    '&', ('end_sale_datetime', '>', since_dt), ('end_sale_datetime', '<=', now),
+                    '&', ('event_id.date_end', '>', since_dt), ('event_id.date_end', '<=', now),
+                ]),
+            ]
+        return domain
+
+    def _get_event_catalog_removed(self, since_dt=None):
+        """Event product templates written after the cursor that left the catalog
+
+        Archiving, unpublishing or unlinking the event of a template writes
+        it, so the templates written since the cursor that no longer match the
+        catalog domain are the ones clients must drop.
+        """
+        if not since_dt:
+            return request.env['product.template']
+        Template = request.env['product.template'].sudo().with_context(active_test=False)
+        written = Template.search([
+            ('service_tracking', '=', 'event'),
+            ('write_date', '>', since_dt),
+        ], order='id')
+        if not written:
+            return Template
+        listed = Template.with_context(active_test=True).search(
+            self._get_event_catalog_domain() + [('id', 'in', written.ids)]
+        )
+        return written - listed
+
+    def _get_event_catalog_version(self, domain, since, removed=None):
+        """Return the next ``since`` cursor and the ETag of the catalog
+
+        Both come from a few aggregate queries, so unchanged catalogs are
+        answered without serializing any product. Registrations, and sale
+        windows opening or closing, change availability without writing the
+        tickets: their dates move the cursor too, and the set of currently
+        available tickets is part of the ETag.
+        """
+        env = request.env
+        templates = env['product.template'].sudo().search(domain)
+        variants = templates.product_variant_ids.filtered('event_ticket_id')
+        tickets = variants.event_ticket_id
+        removed = removed or templates.browse()
+        write_dates = [
+            record._read_group([('id', 'in', record.ids)], aggregates=['write_date:max'])[0][0]
+            for record in (templates, variants, tickets, tickets.event_id, removed.with_context(active_test=False))
+            if record
+        ]
+        if tickets:
+            [[registration_write_date]] = env['event.registration'].sudo().with_context(active_test=False)._read_group(
+                [('event_ticket_id', 'in', tickets.ids)], aggregates=['write_date:max'],
+            )
+            now = fields.Datetime.now()
+            write_dates += [
+                date for date in [registration_write_date]
+                + tickets.mapped('start_sale_datetime') + tickets.mapped('end_sale_datetime') + tickets.event_id.mapped('date_end')
+                if date and date <= now
+            ]
+        available_ticket_ids = tickets._filter_store_sale_available().ids
+        next_since = fields.Datetime.to_string(max(write_dates)) if write_dates else since
+        version = repr((templates.ids, variants.ids, write_dates, available_ticket_ids, removed.ids, since))
+        return next_since, hashlib.sha1(version.encode()).hexdigest()
 
     @http.route(['/shop/payment/validate'], type='http', auth="public", website=True, sitemap=False)
+    @profiled_route('payment_validate')
+    @instrumented_route('payment_validate')
     def shop_payment_validate(self, sale_order_id=None, **post):
         """Override to redirect to attendee collection for event orders after payment"""
         if sale_order_id is None:
@@ -84,6 +310,7 @@ class WebsiteEventTicketStore(WebsiteSale):
                 has_registrations = any(line.registration_ids for line in event_lines)
 
                 if not has_registrations:
+                    self._count_held_order(order)
                     # Generate access token for the order (like paid orders)
                     token = order._generate_attendee_access_token()
                     # Send email reminder
@@ -104,6 +331,7 @@ class WebsiteEventTicketStore(WebsiteSale):
             has_registrations = any(line.registration_ids for line in event_lines)
 
             if not has_registrations:
+                self._count_held_order(order)
                 # Generate access token for the order
                 token = order._generate_attendee_access_token()
                 # Send email reminder
@@ -119,6 +347,7 @@ class WebsiteEventTicketStore(WebsiteSale):
         return request.redirect('/shop/confirmation')
 
     @http.route(['/shop/event_attendees_post_payment'], type='http', auth="public", methods=['GET', 'POST'], website=True, csrf=False)
+    @profiled_route('event_attendees_post_payment')
     def event_attendees_post_payment(self, **kw):
         """Event attendee collection after payment confirmation - DEPRECATED, use token-based route"""
         # For backward compatibility, redirect to shop if no session order
@@ -135,6 +364,7 @@ class WebsiteEventTicketStore(WebsiteSale):
         return request.redirect(order.get_attendee_details_url())
 
     @http.route(['/my/orders/<int:order_id>/attendee-details/<string:access_token>'], type='http', auth="public", methods=['GET', 'POST'], website=True, csrf=False)
+    @profiled_route('attendee_details')
     def order_attendee_details(self, order_id, access_token, **kw):
         """Token-based attendee collection page"""
         try:
@@ -164,27 +394,37 @@ class WebsiteEventTicketStore(WebsiteSale):
             return request.redirect(order.get_portal_url())
 
         if request.httprequest.method == 'POST':
-            # Process attendee data and create registrations
-            self._process_event_attendee_data_from_checkout(order, kw)
-
-            # Now confirm the order since we have attendee data
-            order.with_context(skip_attendee_validation=True).action_confirm()
-
-            # If the order is paid and still 'to invoice', create and post the invoice now
-            try:
-                tx_check = order.get_portal_last_transaction()
-                if order.invoice_status == 'to invoice' and tx_check and tx_check.state in ['done', 'authorized']:
-                    invoices = order._create_invoices()
-                    if invoices:
-                        invoices.action_post()
-            except Exception:
-                # Avoid blocking the user flow; invoice can be generated manually if needed
-                pass
-
-            # Store the order ID for confirmation page
-            request.session['sale_last_order_id'] = order.id
-            # Redirect to final confirmation
-            return request.redirect('/shop/confirmation')
+            post_start = time.perf_counter()
+            with store_span(request.env, 'attendee_post') as span:
+                # Process attendee data and create registrations
+                self._process_event_attendee_data_from_checkout(order, kw)
+                span.records = len(order.order_line.registration_ids)
+
+                # Now confirm the order since we have attendee data
+                order.with_context(skip_attendee_validation=True).action_confirm()
+
+                # If the order is paid and still 'to invoice', create and post the invoice now
+                try:
+                    tx_check = order.get_portal_last_transaction()
+                    if order.invoice_status == 'to invoice' and tx_check and tx_check.state in ['done', 'authorized']:
+                        invoices = order._create_invoices()
+                        if invoices:
+                            invoices.action_post()
+                except Exception:
+                    # Avoid blocking the user flow; invoice can be generated manually if needed
+                    pass
+
+                metrics.ATTENDEE_COMPLETIONS.inc()
+                if has_valid_payment and tx.last_state_change:
+                    metrics.PAYMENT_TO_ATTENDEE_SECONDS.observe(
+                        (fields.Datetime.now() - tx.last_state_change).total_seconds()
+                    )
+                metrics.ATTENDEE_POST_SECONDS.observe(time.perf_counter() - post_start)
+
+                # Store the order ID for confirmation page
+                request.session['sale_last_order_id'] = order.id
+                # Redirect to final confirmation
+                return request.redirect('/shop/confirmation')
 
         # Render the post-payment attendee collection page
         values = {
@@ -194,59 +434,95 @@ class WebsiteEventTicketStore(WebsiteSale):
         return request.render('website_event_ticket_store.event_attendee_post_payment', values)
 
     def _get_order_with_token(self, order_id, access_token):
-        """Get order and verify access token"""
-        order = request.env['sale.order'].sudo().browse(order_id)
+        """Get order and verify access token
 
-        if not order.exists():
-            raise ValidationError(_('Order not found'))
+        Signed tokens are checked before the order is read. Clients with too
+        many failed attempts are refused without checking their token.
+        """
+        address = request.httprequest.remote_addr
+        if access_tokens.is_rate_limited(address):
+            raise AccessError(_('Too many invalid access attempts'))
 
-        if not order.attendee_access_token or order.attendee_access_token != access_token:
+        order = request.env['sale.order'].sudo().browse(order_id)
+        if access_tokens.check_attendee_token(request.env, order_id, access_token):
+            if not order.exists():
+                raise ValidationError(_('Order not found'))
+            return order
+
+        # Only tokens generated before signed tokens are looked up in the database
+        if (
+            not access_tokens.is_legacy_token(access_token)
+            or not order.exists()
+            or order.attendee_access_token != access_token
+        ):
+            access_tokens.register_failure(address)
             raise AccessError(_('Invalid access token'))
 
         return order
 
+    def _count_held_order(self, order):
+        """Count an order held for attendee details once per browser session"""
+        held_order_ids = request.session.get('event_ticket_store_held_order_ids', [])
+        if order.id not in held_order_ids:
+            metrics.ORDERS_HELD.inc()
+            request.session['event_ticket_store_held_order_ids'] = held_order_ids + [order.id]
+
     def _send_attendee_details_reminder(self, order):
         """Send email reminder to complete attendee details"""
         template = request.env.ref('website_event_ticket_store.mail_template_attendee_details_reminder', raise_if_not_found=False)
         if template:
             template.sudo().send_mail(order.id, force_send=True, email_values={'email_to': order.partner_id.email})
+            metrics.REMINDERS_SENT.inc()
 
     def _process_event_attendee_data_from_checkout(self, order, form_data):
         """Process attendee data from checkout step and create event registrations"""
         import logging
         _logger = logging.getLogger(__name__)
 
-        _logger.info(f"Processing attendee data for order {order.id}")
-        _logger.info(f"Form data keys: {list(form_data.keys())}")
+        _logger.debug(f"Processing attendee data for order {order.id}")
+        _logger.debug(f"Form data keys: {list(form_data.keys())}")
 
         # Clear existing registrations for this order
         order.order_line.mapped('registration_ids').unlink()
 
-        # Process each attendee
+        # Read every referenced line and ticket at once instead of per attendee
+        attendee_counters = []
         attendee_counter = 1
         while f"{attendee_counter}-event_ticket_id" in form_data:
+            attendee_counters.append(attendee_counter)
+            attendee_counter += 1
+        existing_line_ids = set(request.env['sale.order.line'].browse({
+            int(form_data[f"{counter}-sale_order_line_id"]) for counter in attendee_counters
+            if str(form_data.get(f"{counter}-sale_order_line_id") or '').isdigit()
+        }).exists().ids)
+        existing_tickets = request.env['event.event.ticket'].browse({
+            int(form_data[f"{counter}-event_ticket_id"]) for counter in attendee_counters
+            if str(form_data.get(f"{counter}-event_ticket_id") or '').isdigit()
+        }).exists()
+        ticket_by_id = {ticket.id: ticket for ticket in existing_tickets}
+
+        # Process each attendee
+        registration_vals_list = []
+        registration_counters = []
+        for attendee_counter in attendee_counters:
             event_ticket_id = form_data.get(f"{attendee_counter}-event_ticket_id")
             sale_order_line_id = form_data.get(f"{attendee_counter}-sale_order_line_id")
 
-            _logger.info(f"Processing attendee {attendee_counter}: ticket_id={event_ticket_id}, line_id={sale_order_line_id}")
+            _logger.debug(f"Processing attendee {attendee_counter}: ticket_id={event_ticket_id}, line_id={sale_order_line_id}")
 
             if not event_ticket_id or not sale_order_line_id:
                 _logger.warning(f"Missing data for attendee {attendee_counter}")
-                attendee_counter += 1
                 continue
 
             # Get the order line and event ticket
-            order_line = request.env['sale.order.line'].browse(int(sale_order_line_id))
-            event_ticket = request.env['event.event.ticket'].browse(int(event_ticket_id))
-
-            if not order_line.exists() or not event_ticket.exists():
+            event_ticket = ticket_by_id.get(int(event_ticket_id)) if str(event_ticket_id).isdigit() else None
+            if not event_ticket or not str(sale_order_line_id).isdigit() or int(sale_order_line_id) not in existing_line_ids:
                 _logger.warning(f"Order line or event ticket not found for attendee {attendee_counter}")
-                attendee_counter += 1
                 continue
 
             # Extract attendee data from event questions
             attendee_data = self._extract_attendee_data_from_questions(event_ticket.event_id, form_data, attendee_counter)
-            _logger.info(f"Extracted attendee data: {attendee_data}")
+            _logger.debug(f"Extracted attendee data: {attendee_data}")
 
             # If no attendee data was extracted from questions, try to get basic info from form
             if not attendee_data:
@@ -257,31 +533,31 @@ class WebsiteEventTicketStore(WebsiteSale):
                     'phone': form_data.get(f"{attendee_counter}-phone", ''),
                     'company_name': form_data.get(f"{attendee_counter}-company_name", ''),
                 }
-                _logger.info(f"Using direct form data: {attendee_data}")
+                _logger.debug(f"Using direct form data: {attendee_data}")
 
-            # Create registration with extracted data
-            vals = {
+            # Registration with extracted data, created with the others below
+            registration_vals_list.append({
                 'event_id': event_ticket.event_id.id,
                 'event_ticket_id': event_ticket.id,
                 'sale_order_id': order.id,
-                'sale_order_line_id': order_line.id,
+                'sale_order_line_id': int(sale_order_line_id),
                 'name': attendee_data.get('name', ''),
                 'email': attendee_data.get('email', ''),
                 'phone': attendee_data.get('phone', ''),
                 'company_name': attendee_data.get('company_name', ''),
                 'state': 'draft',
-            }
-
-            _logger.info(f"Creating registration with vals: {vals}")
-
-            # Create registration
-            registration = request.env['event.registration'].sudo().create(vals)
-            _logger.info(f"Created registration: {registration.id}")
-
-            # Process event question answers
-            self._process_event_question_answers(event_ticket.event_id, form_data, registration, attendee_counter)
-
-            attendee_counter += 1
+            })
+            registration_counters.append(attendee_counter)
+
+        # Create all registrations, then all their question answers, in one batch each
+        registrations = request.env['event.registration'].sudo().create(registration_vals_list)
+        _logger.debug(f"Created registrations: {registrations.ids}")
+        answer_vals_list = []
+        for registration, attendee_counter in zip(registrations, registration_counters):
+            answer_vals_list += self._get_event_question_answer_values(
+                registration.event_id, form_data, registration, attendee_counter,
+            )
+        request.env['event.registration.answer'].sudo().create(answer_vals_list)
 
     def _process_event_attendee_data(self, product, form_data, quantity):
         """Process attendee data from form and create event registrations (legacy method)"""
@@ -330,11 +606,11 @@ class WebsiteEventTicketStore(WebsiteSale):
 
         attendee_data = {}
 
-        _logger.info(f"Extracting data for event {event.id}, attendee {attendee_counter}")
-        _logger.info(f"Event has {len(event.question_ids)} questions")
+        _logger.debug(f"Extracting data for event {event.id}, attendee {attendee_counter}")
+        _logger.debug(f"Event has {len(event.question_ids)} questions")
 
         if not event.question_ids:
-            _logger.info("No event questions found")
+            _logger.debug("No event questions found")
             return attendee_data
 
         # Look for standard attendee fields in questions
@@ -342,7 +618,7 @@ class WebsiteEventTicketStore(WebsiteSale):
             field_name = f"{attendee_counter}-{question.question_type}-{question.id}"
             answer_value = form_data.get(field_name, '').strip()
 
-            _logger.info(f"Question {question.id} ({question.question_type}): field_name={field_name}, value='{answer_value}'")
+            _logger.debug(f"Question {question.id} ({question.question_type}): field_name={field_name}, value='{answer_value}'")
 
             if not answer_value:
                 continue
@@ -357,14 +633,19 @@ class WebsiteEventTicketStore(WebsiteSale):
             elif question.question_type == 'company_name':
                 attendee_data['company_name'] = answer_value
 
-        _logger.info(f"Final attendee data: {attendee_data}")
+        _logger.debug(f"Final attendee data: {attendee_data}")
         return attendee_data
 
     def _process_event_question_answers(self, event, form_data, registration, attendee_counter=1):
         """Process event question answers and create registration answers"""
+        answer_vals_list = self._get_event_question_answer_values(event, form_data, registration, attendee_counter)
+        request.env['event.registration.answer'].sudo().create(answer_vals_list)
 
+    def _get_event_question_answer_values(self, event, form_data, registration, attendee_counter=1):
+        """Return the values of the registration answers submitted for one attendee"""
+        answer_vals_list = []
         if not event.question_ids or not registration:
-            return
+            return answer_vals_list
 
         # Process each question
         for question in event.question_ids:
@@ -374,7 +655,7 @@ class WebsiteEventTicketStore(WebsiteSale):
             if not answer_value:
                 continue
 
-            # Create registration answer
+            # Registration answer values
             answer_vals = {
                 'registration_id': registration.id,
                 'question_id': question.id,
@@ -385,77 +666,146 @@ class WebsiteEventTicketStore(WebsiteSale):
             else:
                 answer_vals['value_text_box'] = answer_value
 
-            request.env['event.registration.answer'].sudo().create(answer_vals)
+            answer_vals_list.append(answer_vals)
+        return answer_vals_list
+
+
+class EventTicketStoreEvents(WebsiteEventController):
+    """Resolve the store redirects of the listed events in one batch"""
+
+    @http.route()
+    def events(self, page=1, **searches):
+        result = super().events(page=page, **searches)
+        if hasattr(result, 'qcontext') and result.qcontext.get('event_ids'):
+            result.qcontext['store_redirects'] = result.qcontext['event_ids']._get_store_redirects()
+        return result
+
+
+class EventTicketStoreMetrics(http.Controller):
+    """Prometheus-style metrics of the ticket store, served to scrapers holding the configured token"""
+
+    @http.route(['/event_ticket_store/metrics'], type='http', auth="none", methods=['GET'], save_session=False)
+    def event_ticket_store_metrics(self, **kw):
+        """Serve the in-memory metrics of this worker in text exposition format"""
+        # The client address is no proof: behind a local proxy every request comes from loopback
+        if not metrics.is_scrape_authorized(request.httprequest.headers.get('Authorization')):
+            return request.make_response('Forbidden', status=403)
+        return request.make_response(
+            metrics.render_metrics(),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
+
+
+class EventTicketStoreExport(http.Controller):
+    """Streamed exports of the ticket store for event organizers"""
+
+    EXPORT_CONTENT_TYPES = {
+        'csv': 'text/csv; charset=utf-8',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    @http.route(['/event_ticket_store/event/<int:event_id>/registrations.<string:file_format>'], type='http', auth="user", methods=['GET'])
+    def event_registrations_export(self, event_id, file_format, **kw):
+        """Stream the registrations of an event with their orders and answers"""
+        if file_format not in self.EXPORT_CONTENT_TYPES or not request.env.user.has_group('event.group_event_user'):
+            return request.not_found()
+        event = request.env['event.event'].browse(event_id).exists()
+        if not event:
+            return request.not_found()
+        event.check_access('read')
+
+        # The response is consumed after the request cursor is closed
+        rows = rows_in_new_cursor(
+            request.env.cr.dbname, request.env.uid, dict(request.env.context),
+            lambda env: env['event.event'].browse(event_id)._iter_store_registration_rows(),
+        )
+        if file_format == 'xlsx':
+            chunks = xlsx_chunks(rows, event.name)
+        else:
+            chunks = csv_chunks(rows)
+        filename = f'{event.name} - {_("Registrations")}.{file_format}'
+        return request.make_response(chunks, headers=[
+            ('Content-Type', self.EXPORT_CONTENT_TYPES[file_format]),
+            ('Content-Disposition', http.content_disposition(filename)),
+        ])
+
+
+class EventTicketStoreBoxOffice(http.Controller):
+    """Box office sales of event tickets for kiosks and barcode scanners"""
+
+    @http.route(['/event_ticket_store/box_office/sell'], type='json', auth="user", methods=['POST'])
+    def box_office_sell(self, seats, journal_id, partner_id=None, **kw):
+        """Sell scanned seats in one transaction and return the paid order
+
+        ``seats`` lists one entry per seat: a ticket variant barcode, or a dict
+        with ``barcode`` and optional attendee ``name``, ``email`` and ``phone``.
+        """
+        if not request.env.user.has_group('sales_team.group_sale_salesman'):
+            raise AccessError(_("Only salespeople can sell tickets at the box office."))
+        seats = [{'barcode': seat} if isinstance(seat, str) else seat for seat in seats]
+
+        barcodes = {seat.get('barcode') for seat in seats}
+        products = request.env['product.product'].search([
+            ('barcode', 'in', list(barcodes)),
+            ('service_tracking', '=', 'event'),
+        ])
+        products_by_barcode = {product.barcode: product for product in products}
+        unknown_barcodes = barcodes - set(products_by_barcode)
+        if unknown_barcodes:
+            raise ValidationError(_("Unknown ticket barcodes: %s", ', '.join(sorted(map(str, unknown_barcodes)))))
+
+        seats_by_product = {}
+        for seat in seats:
+            seats_by_product.setdefault(products_by_barcode[seat['barcode']], []).append(seat)
+        partner = request.env['res.partner'].browse(partner_id) if partner_id else request.env.ref('base.public_partner')
+        order = request.env['sale.order']._create_box_office_order(
+            partner, list(seats_by_product.items()), request.env['account.journal'].browse(journal_id),
+        )
+        return {
+            'order_id': order.id,
+            'name': order.name,
+            'amount_total': order.amount_total,
+            'registration_ids': order.order_line.registration_ids.ids,
+        }
 
 
 class EventTicketStorePortal(CustomerPortal):
     """Portal controller for event ticket store"""
 
+    @instrumented_route('portal_counters')
     def _prepare_home_portal_values(self, counters):
         """Add pending event registrations counter to portal"""
         values = super()._prepare_home_portal_values(counters)
 
         if 'pending_event_registrations_count' in counters:
-            # Count orders with pending attendee details
-            partner = request.env.user.partner_id
-            domain = [
-                ('partner_id', '=', partner.id),
-                ('state', 'in', ['draft', 'sent']),
-            ]
-
-            pending_count = 0
-            orders = request.env['sale.order'].search(domain)
-            for order in orders:
-                if order._has_pending_attendee_details():
-                    tx = order.get_portal_last_transaction()
-                    if tx and tx.state in ['done', 'authorized']:
-                        pending_count += 1
-
-            values['pending_event_registrations_count'] = pending_count
+            # Count orders with pending attendee details, as listed by /my/pending-registrations
+            values['pending_event_registrations_count'] = len(self._get_portal_pending_orders())
 
         if 'event_registrations_count' in counters:
-            partner = request.env.user.partner_id
             # Count all registrations related to user's orders
-            registrations_domain = [
-                ('sale_order_id.partner_id', '=', partner.id),
-            ]
+            registrations_domain = self._get_portal_registrations_domain()
             values['event_registrations_count'] = request.env['event.registration'].sudo().search_count(registrations_domain)
 
         return values
 
     @http.route(['/my/pending-registrations'], type='http', auth="user", website=True)
+    @profiled_route('pending_registrations')
     def portal_my_pending_registrations(self, **kw):
         """Display orders with pending attendee details"""
-        partner = request.env.user.partner_id
-
-        # Find all orders with pending attendee details
-        domain = [
-            ('partner_id', '=', partner.id),
-            ('state', 'in', ['draft', 'sent']),
-        ]
-
-        orders = request.env['sale.order'].search(domain)
-        pending_orders = request.env['sale.order']
-        for o in orders:
-            if o._has_pending_attendee_details():
-                tx = o.get_portal_last_transaction()
-                if tx and tx.state in ['done', 'authorized']:
-                    pending_orders |= o
-
         values = {
-            'pending_orders': pending_orders,
+            'pending_orders': self._get_portal_pending_orders(),
             'page_name': 'pending_registrations',
         }
 
         return request.render('website_event_ticket_store.portal_my_pending_registrations', values)
 
     @http.route(['/my/registrations'], type='http', auth="user", website=True)
+    @profiled_route('registrations')
     def portal_my_registrations(self, page=1, **kw):
         """Display all event registrations linked to customer's orders"""
-        partner = request.env.user.partner_id
         Registration = request.env['event.registration']
 
-        domain = [('sale_order_id.partner_id', '=', partner.id)]
+        domain = self._get_portal_registrations_domain()
 
         # Simple pager
         total = Registration.sudo().search_count(domain)
@@ -468,5 +818,98 @@ class EventTicketStorePortal(CustomerPortal):
             'registrations': registrations,
             'page_name': 'event_registrations',
             'pager': pager,
+            'registrations_feed_url': self._get_registrations_feed_url(request.env.user.partner_id),
         }
         return request.render('website_event_ticket_store.portal_my_registrations', values)
+
+    @http.route(['/my/registrations.<string:file_format>'], type='http', auth="user", methods=['GET'])
+    def portal_my_registrations_export(self, file_format, **kw):
+        """Stream all the customer's registrations as CSV
+
+        The iCalendar feed is served at a signed URL calendar clients can
+        subscribe to without a session, see ``portal_registrations_feed``.
+        """
+        if file_format == 'ics':
+            return request.redirect(self._get_registrations_feed_url(request.env.user.partner_id))
+        if file_format != 'csv':
+            return request.not_found()
+        return self._make_registrations_export_response(file_format, self._get_portal_registrations_domain())
+
+    @http.route(['/event_ticket_store/registrations/<int:partner_id>/<string:token>/calendar.ics'], type='http', auth="public", methods=['GET'])
+    def portal_registrations_feed(self, partner_id, token, **kw):
+        """Stream the events a customer holds registrations for as an iCalendar feed
+
+        The token is signed per partner, so it is checked without reading the
+        partner and failed attempts are throttled like attendee tokens.
+        """
+        address = request.httprequest.remote_addr
+        if access_tokens.is_rate_limited(address):
+            return request.make_response(_('Too many invalid access attempts'), status=429)
+        if not access_tokens.check_registrations_feed_token(request.env, partner_id, token):
+            access_tokens.register_failure(address)
+            return request.not_found()
+        return self._make_registrations_export_response('ics', self._get_portal_registrations_domain(partner_id))
+
+    def _get_portal_pending_orders(self):
+        """Paid orders of the portal user still waiting for their attendee details
+
+        Shared by the portal counter and the list it links to. Awaiting orders
+        are filtered in batch, then their transactions read at once.
+        """
+        orders = request.env['sale.order'].search([
+            ('partner_id', '=', request.env.user.partner_id.id),
+            ('state', 'in', ['draft', 'sent']),
+        ])._filter_awaiting_attendee_details()
+        return orders.filtered(
+            lambda order: any(tx.state in ['done', 'authorized'] for tx in order.transaction_ids)
+        )
+
+    def _make_registrations_export_response(self, file_format, domain):
+        """Stream the registrations matching ``domain`` as CSV or iCalendar
+
+        Responses carry an ETag and a Last-Modified date, so subscribed
+        calendars polling an unchanged feed get a 304 from a few aggregates.
+        """
+        Registration = request.env['event.registration'].sudo()
+        last_modified, etag = Registration._get_portal_export_version(domain)
+        headers = [
+            ('ETag', '"%s"' % etag),
+            ('Cache-Control', 'private, no-cache'),
+        ]
+        if last_modified:
+            last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+            headers.append(('Last-Modified', http_date(last_modified)))
+        if_modified_since = request.httprequest.if_modified_since
+        if request.httprequest.if_none_match.contains(etag) or (
+            not request.httprequest.if_none_match
+            and if_modified_since and last_modified and last_modified <= if_modified_since
+        ):
+            return request.make_response('', headers=headers, status=304)
+
+        # The response is consumed after the request cursor is closed
+        if file_format == 'ics':
+            lines = rows_in_new_cursor(
+                request.env.cr.dbname, request.env.uid, dict(request.env.context),
+                lambda env: env['event.registration'].sudo()._iter_portal_ics_lines(domain),
+            )
+            chunks = ics_chunks(lines)
+            headers.append(('Content-Type', 'text/calendar; charset=utf-8'))
+        else:
+            rows = rows_in_new_cursor(
+                request.env.cr.dbname, request.env.uid, dict(request.env.context),
+                lambda env: env['event.registration'].sudo()._iter_portal_export_rows(domain),
+            )
+            chunks = csv_chunks(rows)
+            headers.append(('Content-Type', 'text/csv; charset=utf-8'))
+        filename = f'{_("My Event Registrations")}.{file_format}'
+        headers.append(('Content-Disposition', http.content_disposition(filename)))
+        return request.make_response(chunks, headers=headers)
+
+    def _get_registrations_feed_url(self, partner):
+        """Signed URL of the partner's registrations calendar feed"""
+        token = access_tokens.sign_registrations_feed_token(request.env, partner.id)
+        return f'/event_ticket_store/registrations/{partner.id}/{token}/calendar.ics'
+
+    def _get_portal_registrations_domain(self, partner_id=None):
+        """Domain of the registrations listed and exported for the portal user, or the given partner"""
+        return [('sale_order_id.partner_id', '=', partner_id or request.env.user.partner_id.id)]
@@ -2,9 +2,16 @@
 
 from . import product_template
 from . import product_product
+from . import product_pricelist
+from . import product_template_attribute_value
 from . import sale_order_line
 from . import sale_order
 from . import event_event
 from . import event_event_ticket
+from . import event_registration
 from . import website
+from . import ir_http
 from . import payment_transaction
+from . import event_ticket_store_instrumentation
+from . import event_ticket_store_box_office
+from . import event_ticket_store_provisioning
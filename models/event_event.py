@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 
 
 class EventEvent(models.Model):
     _inherit = 'event.event'
 
+    # Registrations read per batch by the store registration export
+    STORE_EXPORT_BATCH_SIZE = 1000
+
     # Store redirect options
     redirect_to_store = fields.Boolean(
         string='Redirect Register Button to Store',
@@ -20,6 +23,12 @@ class EventEvent(models.Model):
         domain=[('service_tracking', '=', 'event')]
     )
 
+    def write(self, vals):
+        """Override write to refresh the store snapshots of the event tickets"""
+        result = super().write(vals)
+        self.env['event.event.ticket']._invalidate_store_snapshots()
+        return result
+
     @api.onchange('redirect_to_store')
     def _onchange_redirect_to_store(self):
         """Clear store product when redirect is disabled"""
@@ -29,13 +38,40 @@ class EventEvent(models.Model):
     def get_store_redirect_url(self):
         """Get the URL to redirect to for store registration"""
         self.ensure_one()
-        if not self.redirect_to_store:
-            return False
+        return self._get_store_redirects()[self.id]['url']
+
+    def _get_store_redirects(self):
+        """Resolve the store redirect of every event of the recordset at once
 
-        if self.store_product_template_id:
-            return f'/shop/product/{self.store_product_template_id.id}'
-        else:
-            return '/shop'
+        Returns a dict mapping event ids to ``{'url', 'is_available'}``. The
+        URL is the canonical slugged URL of the store product, so buyers are
+        not redirected again. ``is_available`` is False when none of the
+        tickets sold by the store product can be bought.
+        """
+        events = self.filtered('redirect_to_store')
+        templates = events.store_product_template_id
+        # One batch of availability checks for the tickets of all templates
+        tickets = templates.product_variant_ids.event_ticket_id
+        available_tickets = tickets._filter_store_sale_available()
+        redirects = {event_id: {'url': False, 'is_available': False} for event_id in self.ids}
+        for event in events:
+            template = event.store_product_template_id
+            if not template:
+                redirects[event.id] = {'url': '/shop', 'is_available': event.event_registrations_open}
+                continue
+            redirects[event.id] = {
+                'url': self._get_store_redirect_url(
+                    event.id, event.write_date, template.id, template.write_date, self.env.lang,
+                ),
+                'is_available': bool(template.product_variant_ids.event_ticket_id & available_tickets),
+            }
+        return redirects
+
+    @api.model
+    @tools.ormcache('event_id', 'write_date', 'template_id', 'template_write_date', 'lang')
+    def _get_store_redirect_url(self, event_id, write_date, template_id, template_write_date, lang):
+        """Canonical URL of a store product, cached until the event or product is written"""
+        return self.env['product.template'].browse(template_id).website_url
 
     def action_view_store_products(self):
         """Action to view store products for this event"""
@@ -51,3 +87,181 @@ class EventEvent(models.Model):
                 'default_event_id': self.id,
             }
         }
+
+    def _get_store_ticket_value_names(self):
+        """Return the ticket attribute value name of each ticket of the events
+
+        Ticket names are reused across events, so values are shared. Tickets
+        sharing a name within one event are told apart by their id.
+        """
+        names = {}
+        for event in self:
+            counts = {}
+            for ticket in event.event_ticket_ids:
+                counts[ticket.name] = counts.get(ticket.name, 0) + 1
+            for ticket in event.event_ticket_ids:
+                names[ticket] = ticket.name if counts[ticket.name] == 1 else f'{ticket.name} ({ticket.id})'
+        return names
+
+    def _get_store_ticket_values(self, tickets):
+        """Return the "Event Ticket" attribute value of each of the tickets
+
+        Missing values are created in one batch.
+        """
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket')
+        AttributeValue = self.env['product.attribute.value']
+        value_names = tickets.event_id._get_store_ticket_value_names()
+        names = {value_names[ticket] for ticket in tickets}
+        values = AttributeValue.search([('attribute_id', '=', attribute.id), ('name', 'in', list(names))])
+        new_names = names - set(values.mapped('name'))
+        values |= AttributeValue.create([{'attribute_id': attribute.id, 'name': name} for name in sorted(new_names)])
+        value_by_name = {value.name: value for value in values}
+        return {ticket: value_by_name[value_names[ticket]] for ticket in tickets}
+
+    @api.model
+    def _link_store_ticket_variants(self, templates, value_by_ticket):
+        """Set the ticket of the template variants carrying the attribute value of one of the tickets"""
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket')
+        for template in templates:
+            ticket_by_value = {
+                value_by_ticket[ticket]: ticket
+                for ticket in template.event_id.event_ticket_ids if ticket in value_by_ticket
+            }
+            for variant in template.product_variant_ids:
+                value = variant.product_template_attribute_value_ids.product_attribute_value_id.filtered(
+                    lambda value: value.attribute_id == attribute
+                )
+                ticket = ticket_by_value.get(value)
+                if ticket and variant.event_ticket_id != ticket:
+                    variant.event_ticket_id = ticket
+
+    def _provision_store_products(self):
+        """Create or complete one store product template per event, one variant per ticket
+
+        Variants come from the "Event Ticket" attribute. Tickets already sold
+        through a variant are left untouched, so running it again only adds
+        what is missing. Returns the provisioned templates.
+        """
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket')
+        Template = self.env['product.template']
+
+        linked_tickets = self.env['product.product'].search([
+            ('event_ticket_id', 'in', self.event_ticket_ids.ids),
+        ]).event_ticket_id
+        missing_tickets = self.event_ticket_ids - linked_tickets
+        value_by_ticket = self._get_store_ticket_values(missing_tickets)
+
+        # Templates provisioned by earlier runs
+        templates = Template.search([
+            ('event_id', 'in', self.ids),
+            ('service_tracking', '=', 'event'),
+            ('attribute_line_ids.attribute_id', '=', attribute.id),
+        ])
+        template_by_event = {template.event_id: template for template in templates}
+
+        template_vals_list = []
+        for event in self.filtered(lambda event: event not in template_by_event and event.event_ticket_ids):
+            template_vals_list.append({
+                'name': event.name,
+                'type': 'service',
+                'service_tracking': 'event',
+                'event_id': event.id,
+                'sale_ok': True,
+                'website_published': True,
+                'list_price': min(event.event_ticket_ids.mapped('price')),
+                'attribute_line_ids': [(0, 0, {
+                    'attribute_id': attribute.id,
+                    'value_ids': [(6, 0, [
+                        value_by_ticket[ticket].id for ticket in event.event_ticket_ids & missing_tickets
+                    ])],
+                })],
+            })
+        new_templates = Template.create(template_vals_list)
+        template_by_event.update({template.event_id: template for template in new_templates})
+
+        for template in templates:
+            template_tickets = template.event_id.event_ticket_ids & missing_tickets
+            if template_tickets:
+                line = template.attribute_line_ids.filtered(lambda line: line.attribute_id == attribute)
+                template.write({'attribute_line_ids': [(1, line.id, {'value_ids': [
+                    (4, value_by_ticket[ticket].id) for ticket in template_tickets
+                ]})]})
+
+        provisioned_templates = Template.browse([template.id for template in template_by_event.values()])
+        # Link each missing ticket to the variant of its attribute value
+        self._link_store_ticket_variants(provisioned_templates, value_by_ticket)
+        for event in self.filtered(lambda event: not event.store_product_template_id and event in template_by_event):
+            event.store_product_template_id = template_by_event[event]
+        provisioned_templates._sync_event_ticket_prices()
+        return provisioned_templates
+
+    def action_view_store_sales_report(self):
+        """Action to analyze the store ticket sales of this event"""
+        self.ensure_one()
+        action = self.env['ir.actions.act_window']._for_xml_id(
+            'website_event_ticket_store.action_event_ticket_store_sale_report'
+        )
+        action['domain'] = [('event_id', '=', self.id)]
+        action['context'] = {'pivot_row_groupby': ['event_ticket_id']}
+        return action
+
+    def action_export_store_registrations(self):
+        """Download the registrations of the event with their orders and answers"""
+        self.ensure_one()
+        file_format = self.env.context.get('export_format', 'csv')
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/event_ticket_store/event/{self.id}/registrations.{file_format}',
+            'target': 'download',
+        }
+
+    def _iter_store_registration_rows(self, batch_size=None):
+        """Yield the header, then one row per registration of the event
+
+        Registrations are read by id ranges and the cache is cleared between
+        batches, so memory does not grow with the size of the event. Answers
+        are pivoted to one column per event question.
+        """
+        self.ensure_one()
+        batch_size = batch_size or self.STORE_EXPORT_BATCH_SIZE
+        event_id = self.id
+        questions = [(question.id, question.title) for question in self.question_ids]
+        yield [
+            _('Registration ID'), _('Attendee'), _('Email'), _('Phone'), _('Company'), _('Status'),
+            _('Ticket'), _('Product'), _('Order'), _('Order Date'), _('Customer'), _('Unit Price'),
+            _('Registered On'),
+        ] + [title for __, title in questions]
+
+        Registration = self.env['event.registration']
+        last_id = 0
+        while True:
+            registrations = Registration.search(
+                [('event_id', '=', event_id), ('id', '>', last_id)], order='id', limit=batch_size,
+            )
+            if not registrations:
+                break
+            state_labels = dict(registrations._fields['state']._description_selection(self.env))
+            for registration in registrations:
+                answers = {}
+                for answer in registration.registration_answer_ids:
+                    value = answer.value_answer_id.name if answer.value_answer_id else answer.value_text_box
+                    answers.setdefault(answer.question_id.id, []).append(value or '')
+                order = registration.sale_order_id
+                line = registration.sale_order_line_id
+                yield [
+                    registration.id,
+                    registration.name or '',
+                    registration.email or '',
+                    registration.phone or '',
+                    registration.company_name or '',
+                    state_labels.get(registration.state, registration.state),
+                    registration.event_ticket_id.name or '',
+                    line.product_id.display_name or '',
+                    order.name or '',
+                    fields.Datetime.to_string(order.date_order) or '',
+                    order.partner_id.display_name or '',
+                    line.price_unit if line else '',
+                    fields.Datetime.to_string(registration.create_date) or '',
+                ] + [', '.join(answers.get(question_id, [])) for question_id, __ in questions]
+            last_id = registrations[-1].id
+            self.env.invalidate_all()
@@ -1,36 +1,382 @@
 # -*- coding: utf-8 -*-
 
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+
 from odoo import api, fields, models
+from odoo.tools import SQL
+from odoo.addons.website_event_ticket_store.tools import access_tokens
+from odoo.addons.website_event_ticket_store.tools.instrumentation import instrumented, store_span
+
+_logger = logging.getLogger(__name__)
+
+
+class EventTicketSnapshot(namedtuple('EventTicketSnapshot', [
+    'ticket_id', 'event_id', 'event_name', 'event_date_begin', 'event_date_end',
+    'ticket_name', 'ticket_description', 'ticket_price', 'ticket_price_reduce',
+    'seats_limited', 'seats_available', 'is_available',
+    'ticket_write_date', 'event_write_date',
+])):
+    """Immutable view of the ticket and event facts displayed by the store"""
+    __slots__ = ()
+
+    # Upper bound of the 'low' seat availability bucket
+    LOW_SEATS_THRESHOLD = 10
+
+    @property
+    def seats_bucket(self):
+        """Coarse seat availability used to key cached website fragments"""
+        if not self.is_available:
+            return 'unavailable'
+        if not self.seats_limited:
+            return 'unlimited'
+        if self.seats_available <= self.LOW_SEATS_THRESHOLD:
+            return 'low'
+        return 'available'
+
+    def as_event_info(self):
+        """Return the snapshot in the legacy ``_get_event_info`` dict format"""
+        return {
+            'event_name': self.event_name,
+            'event_date_begin': self.event_date_begin,
+            'event_date_end': self.event_date_end,
+            'ticket_name': self.ticket_name,
+            'ticket_price': self.ticket_price,
+            'ticket_price_reduce': self.ticket_price_reduce,
+            'seats_available': self.seats_available,
+            'seats_limited': self.seats_limited,
+            'ticket_description': self.ticket_description,
+            'is_available': self.is_available,
+        }
 
 
 class EventEventTicket(models.Model):
     _inherit = 'event.event.ticket'
 
+    _STORE_SNAPSHOT_CACHE_KEY = 'website_event_ticket_store.ticket_snapshots'
+
+    # Minutes before a sale opens at which the store pages are warmed up
+    STORE_WARMUP_LEAD_MINUTES_PARAM = 'website_event_ticket_store.warmup_lead_minutes'
+    DEFAULT_STORE_WARMUP_LEAD_MINUTES = 5
+    # Requests sent per URL, so that several HTTP workers render each page
+    STORE_WARMUP_REQUESTS_PARAM = 'website_event_ticket_store.warmup_requests'
+    DEFAULT_STORE_WARMUP_REQUESTS = 4
+    STORE_WARMUP_TIMEOUT = 30
+    # Signed sale start sent by warm-up requests, see ir.http._pre_dispatch
+    STORE_WARMUP_HEADER = 'X-Event-Ticket-Store-Warmup'
+
+    store_warmed_sale_datetime = fields.Datetime(
+        string='Store Warmed For Sale Start', copy=False, readonly=True,
+        help="Sale start for which the store pages of this ticket were last warmed up.",
+    )
+
     @api.model
     def create(self, vals):
         """Override create to sync price with products"""
         ticket = super().create(vals)
         ticket._sync_price_to_products()
+        ticket._schedule_store_warmup()
         return ticket
 
     def write(self, vals):
         """Override write to sync price with products when price changes"""
         result = super().write(vals)
+        self._invalidate_store_snapshots()
         if 'price' in vals:
             self._sync_price_to_products()
+        if 'start_sale_datetime' in vals:
+            self._schedule_store_warmup()
         return result
 
+    @instrumented('price_sync')
     def _sync_price_to_products(self):
         """Sync ticket price to all product variants using this ticket"""
-        for ticket in self:
-            # Find product variants that use this ticket
-            variants = self.env['product.product'].search([
-                ('service_tracking', '=', 'event'),
-                ('event_ticket_id', '=', ticket.id)
-            ])
-            # Update the list price on the product template for each variant
-            for variant in variants:
-                # Use context flag to prevent recursion
-                variant.product_tmpl_id.with_context(skip_price_sync=True).write({
-                    'list_price': ticket.price
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket', raise_if_not_found=False)
+        # Find product variants that use these tickets
+        variants = self.env['product.product'].search([
+            ('service_tracking', '=', 'event'),
+            ('event_ticket_id', 'in', self.ids)
+        ])
+        # Provisioned templates price each ticket variant through its attribute value
+        provisioned_templates = variants.product_tmpl_id.filtered(
+            lambda template: attribute and attribute in template.attribute_line_ids.attribute_id
+        )
+        provisioned_templates._sync_event_ticket_prices()
+
+        # Update the list price on the product template for each other variant
+        for variant in variants.filtered(lambda variant: variant.product_tmpl_id not in provisioned_templates):
+            # Use context flag to prevent recursion
+            variant.product_tmpl_id.with_context(skip_price_sync=True).write({
+                'list_price': variant.event_ticket_id.price
+            })
+
+    def _get_store_warmup_lead(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        try:
+            minutes = int(ICP.get_param(self.STORE_WARMUP_LEAD_MINUTES_PARAM, self.DEFAULT_STORE_WARMUP_LEAD_MINUTES))
+        except ValueError:
+            minutes = self.DEFAULT_STORE_WARMUP_LEAD_MINUTES
+        return timedelta(minutes=minutes)
+
+    def _schedule_store_warmup(self):
+        """Trigger the warm-up cron shortly before the upcoming sale starts of the tickets"""
+        cron = self.env.ref('website_event_ticket_store.ir_cron_warm_presale_caches', raise_if_not_found=False)
+        if not cron or not cron.active:
+            return
+        now = fields.Datetime.now()
+        lead = self._get_store_warmup_lead()
+        starts = {ticket.start_sale_datetime for ticket in self if ticket.start_sale_datetime and ticket.start_sale_datetime > now}
+        if starts:
+            cron.sudo()._trigger([max(start - lead, now) for start in starts])
+
+    @api.model
+    def _cron_warm_presale_caches(self):
+        """Scheduled action warming the store pages of tickets whose sale is about to open
+
+        The pages are requested over HTTP, so the QWeb fragments, pricing and
+        ORM caches filled while rendering them live in the HTTP workers that
+        will serve the on-sale rush. Also schedules the warm-ups of the sales
+        opening within a day, for tickets that were never scheduled.
+        """
+        now = fields.Datetime.now()
+        lead = self._get_store_warmup_lead()
+        tickets = self.search([
+            ('start_sale_datetime', '>=', now),
+            ('start_sale_datetime', '<=', now + lead),
+        ]).filtered(lambda ticket: ticket.store_warmed_sale_datetime != ticket.start_sale_datetime)
+        variants = self.env['product.product'].search([
+            ('event_ticket_id', 'in', tickets.ids),
+            ('product_tmpl_id.website_published', '=', True),
+        ])
+
+        with store_span(self.env, 'presale_warmup') as span:
+            for template in variants.product_tmpl_id:
+                base_url = template.get_base_url()
+                template_tickets = template.product_variant_ids.event_ticket_id
+                # Pages are rendered as buyers will get them once the sale is open,
+                # so the fragments are stored under the keys looked up after opening
+                sale_start = max((template_tickets & tickets).mapped('start_sale_datetime'))
+                urls = [
+                    template.website_url,
+                    '/shop/event_ticket/seats?ticket_ids=%s' % ','.join(str(ticket_id) for ticket_id in template_tickets.ids),
+                ]
+                if template.event_id.redirect_to_store:
+                    urls.append(template.event_id.website_url)
+                self._warm_store_urls([base_url + url for url in urls], headers={
+                    self.STORE_WARMUP_HEADER: access_tokens.sign_warmup_token(self.env, sale_start),
                 })
+                span.records += 1
+            variants.event_ticket_id._mark_store_warmed()
+
+        self.search([
+            ('start_sale_datetime', '>', now + lead),
+            ('start_sale_datetime', '<=', now + timedelta(days=1)),
+        ])._schedule_store_warmup()
+        return True
+
+    def _mark_store_warmed(self):
+        """Record the warmed sale start of the tickets without changing their write date
+
+        The write date is part of the fragment cache keys, so a regular write
+        would make the pages just rendered stale before the sale opens.
+        """
+        if not self:
+            return
+        self.env.cr.execute(SQL(
+            "UPDATE event_event_ticket SET store_warmed_sale_datetime = start_sale_datetime WHERE id IN %s",
+            tuple(self.ids),
+        ))
+        self.invalidate_recordset(['store_warmed_sale_datetime'])
+
+    @api.model
+    def _warm_store_urls(self, urls, headers=None):
+        """Request each URL a few times concurrently, logging how long the renders took
+
+        Concurrent requests keep the first HTTP workers busy, so the next ones
+        are handed to other workers, which renders the pages in several of
+        them. Which workers serve them is up to the server.
+        """
+        try:
+            request_count = int(self.env['ir.config_parameter'].sudo().get_param(
+                self.STORE_WARMUP_REQUESTS_PARAM, self.DEFAULT_STORE_WARMUP_REQUESTS,
+            ))
+        except ValueError:
+            request_count = self.DEFAULT_STORE_WARMUP_REQUESTS
+
+        def timed_get(url):
+            start = time.perf_counter()
+            try:
+                # No shared session: each request opens its own connection
+                requests.get(url, headers=headers, timeout=self.STORE_WARMUP_TIMEOUT).raise_for_status()
+            except requests.RequestException as error:
+                _logger.warning("Pre-sale warm-up of %s failed: %s", url, error)
+                return None
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max(request_count, 1)) as executor:
+            for url in urls:
+                durations = [duration for duration in executor.map(timed_get, [url] * request_count) if duration is not None]
+                if durations:
+                    _logger.info(
+                        "Pre-sale warm-up of %s: slowest render %.3fs, fastest %.3fs over %d concurrent requests",
+                        url, max(durations), min(durations), len(durations),
+                    )
+
+    def _is_store_sale_available(self, now=None):
+        """Check if the ticket can currently be bought from the website store"""
+        self.ensure_one()
+        now = now or fields.Datetime.now()
+
+        # Check if ticket is launched (sale has started)
+        if self.start_sale_datetime and self.start_sale_datetime > now:
+            return False
+
+        # Check if ticket is expired (sale has ended)
+        if self.end_sale_datetime and self.end_sale_datetime < now:
+            return False
+
+        # Check if event is not expired
+        if self.event_id.date_end and self.event_id.date_end < now:
+            return False
+
+        # Check seat availability if limited (0 means unlimited)
+        if self.seats_limited and self.seats_available <= 0:
+            return False
+
+        return True
+
+    @api.model
+    def _get_store_available_domain(self, now=None):
+        """Domain of the sale window and event date checks of _is_store_sale_available
+
+        Seat counts are computed, not stored, so they are checked by
+        _filter_store_sale_available instead.
+        """
+        now = now or fields.Datetime.now()
+        return [
+            '|', ('start_sale_datetime', '=', False), ('start_sale_datetime', '<=', now),
+            '|', ('end_sale_datetime', '=', False), ('end_sale_datetime', '>=', now),
+            '|', ('event_id.date_end', '=', False), ('event_id.date_end', '>=', now),
+        ]
+
+    def _filter_store_sale_available(self, now=None):
+        """Batch equivalent of _is_store_sale_available
+
+        One search checks the sale windows and event dates, then the seats of
+        the remaining tickets are computed together.
+        """
+        if not self:
+            return self
+        tickets = self.search([('id', 'in', self.ids)] + self._get_store_available_domain(now))
+        return tickets.filtered(lambda ticket: not ticket.seats_limited or ticket.seats_available > 0)
+
+    @api.model
+    def _get_store_sold_out_query(self):
+        """SQL selecting the ids of limited tickets without seats left
+
+        Counts the same registrations as the ticket seat computation, so shop
+        domains can exclude sold out tickets without computing their seats.
+        """
+        return SQL(
+            """SELECT ticket.id
+                 FROM event_event_ticket ticket
+                WHERE ticket.seats_max > 0
+                  AND ticket.seats_max <= (
+                    SELECT COUNT(*)
+                      FROM event_registration registration
+                     WHERE registration.event_ticket_id = ticket.id
+                       AND registration.state IN ('open', 'done')
+                       AND registration.active
+                  )""",
+        )
+
+    @api.model
+    def _get_store_now(self):
+        """Return the time at which snapshots evaluate availability
+
+        Warm-up requests carry a later time in ``event_ticket_store_now``, the
+        sale start they render the store pages for.
+        """
+        now = fields.Datetime.now()
+        store_now = self.env.context.get('event_ticket_store_now')
+        return max(now, fields.Datetime.to_datetime(store_now)) if store_now else now
+
+    def _get_store_snapshots(self):
+        """Return a dict mapping ticket ids to their EventTicketSnapshot
+
+        Snapshots are built in batch for the whole recordset and memoized on
+        the cursor, so every caller in the same request shares one computation.
+        """
+        cache = self.env.cr.cache.setdefault(self._STORE_SNAPSHOT_CACHE_KEY, {})
+        lang = self.env.lang
+        store_now = self.env.context.get('event_ticket_store_now')
+        missing = self.filtered(lambda ticket: (lang, store_now, ticket.id) not in cache)
+        if missing:
+            now = self._get_store_now()
+            for ticket in missing:
+                cache[(lang, store_now, ticket.id)] = EventTicketSnapshot(
+                    ticket_id=ticket.id,
+                    event_id=ticket.event_id.id,
+                    event_name=ticket.event_id.name,
+                    event_date_begin=ticket.event_id.date_begin,
+                    event_date_end=ticket.event_id.date_end,
+                    ticket_name=ticket.name,
+                    ticket_description=ticket.description or '',
+                    ticket_price=ticket.price,
+                    ticket_price_reduce=ticket.price_reduce,
+                    seats_limited=ticket.seats_limited,
+                    seats_available=ticket.seats_available if ticket.seats_limited else None,
+                    is_available=ticket._is_store_sale_available(now),
+                    ticket_write_date=ticket.write_date,
+                    event_write_date=ticket.event_id.write_date,
+                )
+        return {ticket.id: cache[(lang, store_now, ticket.id)] for ticket in self}
+
+    def _get_store_snapshot(self):
+        """Return the EventTicketSnapshot of a single ticket, or None"""
+        if not self:
+            return None
+        self.ensure_one()
+        return self._get_store_snapshots()[self.id]
+
+    def _get_store_seat_status(self):
+        """Return the live seat status of the tickets as JSON-serializable dicts
+
+        Only ticket and event fields are read, so this stays cheap enough to be
+        polled by the website without loading the product graph.
+        """
+        now = fields.Datetime.now()
+        return [{
+            'id': ticket.id,
+            'seats_limited': ticket.seats_limited,
+            'seats_available': ticket.seats_available if ticket.seats_limited else None,
+            'is_available': ticket._is_store_sale_available(now),
+        } for ticket in self]
+
+    def _get_store_fragment_cache_key(self):
+        """Return the t-cache key of the website fragments displaying this ticket
+
+        Ticket and event writes change the write dates, registrations and sale
+        window transitions change the seat bucket, so stale entries are never hit.
+        Warm-up requests compute the bucket as of the sale start, which is the
+        key looked up once the sale is open.
+        """
+        snapshot = self._get_store_snapshot()
+        if not snapshot:
+            return None
+        return (
+            snapshot.ticket_id,
+            snapshot.ticket_write_date,
+            snapshot.event_write_date,
+            snapshot.seats_bucket,
+            self.env.context.get('tz'),
+        )
+
+    def _invalidate_store_snapshots(self):
+        """Drop memoized snapshots so the next read reflects fresh values"""
+        self.env.cr.cache.pop(self._STORE_SNAPSHOT_CACHE_KEY, None)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+
+from odoo import api, fields, models, _
+from odoo.tools import split_every
+from odoo.tools.sql import create_index
+from odoo.addons.website_event_ticket_store.tools.streaming_export import ics_escape
+
+
+class EventRegistration(models.Model):
+    _inherit = 'event.registration'
+
+    # Records read per batch by the portal registration exports
+    PORTAL_EXPORT_BATCH_SIZE = 500
+
+    def init(self):
+        super().init()
+        # Seat counts of the shop's sold out filter
+        create_index(
+            self.env.cr, 'event_registration_ticket_state_index', self._table,
+            ['event_ticket_id', 'state'], where='active',
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to refresh ticket store snapshots once seats change"""
+        registrations = super().create(vals_list)
+        self.env['event.event.ticket']._invalidate_store_snapshots()
+        return registrations
+
+    def write(self, vals):
+        """Override write to refresh ticket store snapshots when seats may change"""
+        result = super().write(vals)
+        if 'state' in vals or 'event_ticket_id' in vals:
+            self.env['event.event.ticket']._invalidate_store_snapshots()
+        return result
+
+    def unlink(self):
+        """Override unlink to refresh ticket store snapshots once seats are released"""
+        result = super().unlink()
+        self.env['event.event.ticket']._invalidate_store_snapshots()
+        return result
+
+    @api.model
+    def _get_portal_export_version(self, domain):
+        """Return the last modification date and ETag of the registrations of a domain
+
+        Registrations and their events are covered, with three aggregate
+        queries whatever the number of registrations.
+        """
+        [(count, registrations_date)] = self._read_group(domain, aggregates=['__count', 'write_date:max'])
+        event_ids = [event.id for [event] in self._read_group(domain, ['event_id'])]
+        events_date = False
+        if event_ids:
+            [(events_date,)] = self.env['event.event']._read_group(
+                [('id', 'in', event_ids)], aggregates=['write_date:max'],
+            )
+        last_modified = max(filter(None, [registrations_date, events_date]), default=None)
+        version = repr((count, registrations_date, event_ids, events_date))
+        return last_modified, hashlib.sha1(version.encode()).hexdigest()
+
+    @api.model
+    def _iter_portal_export_rows(self, domain, batch_size=None):
+        """Yield the header, then one CSV row per registration of the domain"""
+        batch_size = batch_size or self.PORTAL_EXPORT_BATCH_SIZE
+        yield [
+            _('Attendee'), _('Email'), _('Phone'), _('Event'), _('Event Start'), _('Event End'),
+            _('Ticket'), _('Status'), _('Order'),
+        ]
+        state_labels = dict(self._fields['state']._description_selection(self.env))
+        last_id = 0
+        while True:
+            registrations = self.search(domain + [('id', '>', last_id)], order='id', limit=batch_size)
+            if not registrations:
+                break
+            for registration in registrations:
+                yield [
+                    registration.name or '',
+                    registration.email or '',
+                    registration.phone or '',
+                    registration.event_id.name,
+                    fields.Datetime.to_string(registration.event_id.date_begin),
+                    fields.Datetime.to_string(registration.event_id.date_end),
+                    registration.event_ticket_id.name or '',
+                    state_labels.get(registration.state, registration.state),
+                    registration.sale_order_id.name or '',
+                ]
+            last_id = registrations[-1].id
+            self.env.invalidate_all()
+
+    @api.model
+    def _iter_portal_ics_lines(self, domain, batch_size=None):
+        """Yield the lines of an iCalendar feed with one VEVENT per event of the registrations"""
+        batch_size = batch_size or self.PORTAL_EXPORT_BATCH_SIZE
+        counts = {event.id: count for event, count in self._read_group(domain, ['event_id'], ['__count'])}
+        uid_domain = self.env['ir.config_parameter'].sudo().get_param('database.uuid')
+        ics_date = '%Y%m%dT%H%M%SZ'
+
+        yield 'BEGIN:VCALENDAR'
+        yield 'VERSION:2.0'
+        yield 'PRODID:-//Eventiva//Website Event Ticket Store//EN'
+        yield 'CALSCALE:GREGORIAN'
+        yield f'X-WR-CALNAME:{ics_escape(_("My Event Registrations"))}'
+        for event_ids in split_every(batch_size, sorted(counts)):
+            for event in self.env['event.event'].browse(event_ids):
+                yield 'BEGIN:VEVENT'
+                yield f'UID:event-{event.id}@{uid_domain}'
+                yield f'DTSTAMP:{event.write_date.strftime(ics_date)}'
+                yield f'DTSTART:{event.date_begin.strftime(ics_date)}'
+                yield f'DTEND:{event.date_end.strftime(ics_date)}'
+                yield f'SUMMARY:{ics_escape(event.name)}'
+                if event.address_id:
+                    yield f'LOCATION:{ics_escape(event.address_id.display_name)}'
+                yield f'URL:{event.get_base_url()}{event.website_url}'
+                yield 'DESCRIPTION:' + ics_escape(_("%s registration(s)", counts[event.id]))
+                yield 'END:VEVENT'
+            self.env.invalidate_all()
+        yield 'END:VCALENDAR'
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+
+class EventTicketStoreBoxOffice(models.TransientModel):
+    _name = 'event.ticket.store.box.office'
+    _description = 'Event Ticket Store Box Office'
+
+    partner_id = fields.Many2one(
+        'res.partner', string='Customer', required=True,
+        default=lambda self: self.env.ref('base.public_partner', raise_if_not_found=False),
+    )
+    journal_id = fields.Many2one(
+        'account.journal', string='Payment Journal', required=True,
+        domain=[('type', 'in', ('cash', 'bank'))],
+        default=lambda self: self.env['account.journal'].search([
+            ('type', '=', 'cash'), ('company_id', '=', self.env.company.id),
+        ], limit=1),
+    )
+    barcode = fields.Char(string='Scan Ticket', help='Scan or type the barcode of a ticket variant to add a seat')
+    line_ids = fields.One2many('event.ticket.store.box.office.line', 'box_office_id', string='Seats')
+    amount_total = fields.Float(string='Total at List Price', compute='_compute_amount_total')
+
+    @api.depends('line_ids.product_id', 'line_ids.product_id.lst_price')
+    def _compute_amount_total(self):
+        for box_office in self:
+            box_office.amount_total = sum(box_office.line_ids.product_id.mapped('lst_price'))
+
+    @api.onchange('barcode')
+    def _onchange_barcode(self):
+        """Add one seat of the scanned ticket variant"""
+        if not self.barcode:
+            return
+        product = self.env['product.product'].search([
+            ('barcode', '=', self.barcode),
+            ('service_tracking', '=', 'event'),
+        ], limit=1)
+        self.barcode = False
+        if not product:
+            return {'warning': {
+                'title': _('Unknown Ticket'),
+                'message': _('No event ticket product has this barcode.'),
+            }}
+        self.line_ids = [(0, 0, {'product_id': product.id})]
+
+    def action_sell(self):
+        """Create the paid order and its registrations, then open the order"""
+        self.ensure_one()
+        if not self.line_ids:
+            raise UserError(_("Scan at least one ticket."))
+        # One order line per ticket variant, one registration per seat
+        seats_by_product = {}
+        for line in self.line_ids:
+            seats_by_product.setdefault(line.product_id, []).append({
+                'name': line.attendee_name,
+                'email': line.attendee_email,
+            })
+        order = self.env['sale.order']._create_box_office_order(
+            self.partner_id, list(seats_by_product.items()), self.journal_id,
+        )
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'sale.order',
+            'res_id': order.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
+class EventTicketStoreBoxOfficeLine(models.TransientModel):
+    _name = 'event.ticket.store.box.office.line'
+    _description = 'Event Ticket Store Box Office Seat'
+
+    box_office_id = fields.Many2one('event.ticket.store.box.office', required=True, ondelete='cascade')
+    product_id = fields.Many2one(
+        'product.product', string='Ticket', required=True,
+        domain=[('service_tracking', '=', 'event'), ('event_ticket_id', '!=', False)],
+    )
+    event_ticket_id = fields.Many2one(related='product_id.event_ticket_id')
+    attendee_name = fields.Char(string='Attendee')
+    attendee_email = fields.Char(string='Email')
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from odoo import api, fields, models, _
+from odoo.addons.website_event_ticket_store.tools.instrumentation import (
+    INSTRUMENTATION_PARAM,
+    get_store_stats,
+    reset_store_stats,
+)
+from odoo.addons.website_event_ticket_store.tools.profiling import PROFILER_HEADER, issue_profiling_token
+
+
+class EventTicketStoreInstrumentation(models.TransientModel):
+    _name = 'event.ticket.store.instrumentation'
+    _description = 'Event Ticket Store Instrumentation Report'
+    _order = 'total_duration desc'
+
+    operation = fields.Char(string='Operation', readonly=True)
+    worker_pid = fields.Integer(string='Worker PID', readonly=True)
+    call_count = fields.Integer(string='Calls', readonly=True)
+    total_duration = fields.Float(string='Total Duration (s)', digits=(16, 4), readonly=True)
+    avg_duration = fields.Float(string='Average Duration (s)', digits=(16, 4), readonly=True)
+    max_duration = fields.Float(string='Max Duration (s)', digits=(16, 4), readonly=True)
+    query_count = fields.Integer(string='Queries', readonly=True)
+    avg_query_count = fields.Float(string='Average Queries', digits=(16, 1), readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True)
+
+    @api.model
+    def action_open_report(self):
+        """Snapshot the spans aggregated by the current worker and display them"""
+        self.search([]).unlink()
+        stats = get_store_stats(self.env.cr.dbname)
+        self.create([{
+            'operation': operation,
+            'worker_pid': os.getpid(),
+            'call_count': values['count'],
+            'total_duration': values['duration'],
+            'avg_duration': values['duration'] / values['count'],
+            'max_duration': values['max_duration'],
+            'query_count': values['queries'],
+            'avg_query_count': values['queries'] / values['count'],
+            'record_count': values['records'],
+        } for operation, values in stats.items() if values['count']])
+
+        enabled = self.env['ir.config_parameter'].sudo().get_param(INSTRUMENTATION_PARAM)
+        return {
+            'name': _('Ticket Store Instrumentation') if enabled else _('Ticket Store Instrumentation (disabled)'),
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'view_mode': 'list',
+            'target': 'current',
+        }
+
+    @api.model
+    def action_reset_report(self):
+        """Clear the spans aggregated by the current worker"""
+        reset_store_stats(self.env.cr.dbname)
+        return self.action_open_report()
+
+    @api.model
+    def action_issue_profiling_header(self):
+        """Display a one-hour header enabling the profiler on the store routes"""
+        token = issue_profiling_token(self.env)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Profiling Header'),
+                'message': f'{PROFILER_HEADER}: {token}',
+                'sticky': True,
+            },
+        }
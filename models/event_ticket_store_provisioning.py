@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class EventTicketStoreProvisioning(models.TransientModel):
+    _name = 'event.ticket.store.provisioning'
+    _description = 'Event Ticket Store Product Provisioning'
+
+    event_ids = fields.Many2many(
+        'event.event', string='Events', required=True,
+        default=lambda self: self.env['event.event'].browse(self.env.context.get('active_ids', [])),
+    )
+    redirect_to_store = fields.Boolean(
+        string='Redirect Register Button to Store', default=True,
+        help="Send the visitors of these events to their store product instead of the registration form.",
+    )
+
+    def action_provision(self):
+        """Create or complete the store products of the selected events"""
+        self.ensure_one()
+        events = self.event_ids.filtered('event_ticket_ids')
+        if not events:
+            raise UserError(_("The selected events have no ticket to sell."))
+        templates = events._provision_store_products()
+        if self.redirect_to_store:
+            events.filtered(lambda event: not event.redirect_to_store).redirect_to_store = True
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Store Products'),
+            'res_model': 'product.template',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', templates.ids)],
+        }
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from odoo import fields, models
+from odoo.http import request
+from odoo.addons.website_event_ticket_store.tools import access_tokens
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        """Render pre-sale warm-up requests as of the sale start they were sent for"""
+        super()._pre_dispatch(rule, args)
+        token = request.httprequest.headers.get(request.env['event.event.ticket'].STORE_WARMUP_HEADER)
+        sale_start = token and access_tokens.check_warmup_token(request.env, token)
+        if sale_start:
+            request.update_context(event_ticket_store_now=fields.Datetime.to_string(sale_start))
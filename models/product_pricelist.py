@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, models
+
+
+class ProductPricelist(models.Model):
+    _inherit = 'product.pricelist'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to refresh memoized event line prices"""
+        pricelists = super().create(vals_list)
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return pricelists
+
+    def write(self, vals):
+        """Override write to refresh memoized event line prices"""
+        result = super().write(vals)
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
+
+    def unlink(self):
+        """Override unlink to refresh memoized event line prices"""
+        result = super().unlink()
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
+
+
+class ProductPricelistItem(models.Model):
+    _inherit = 'product.pricelist.item'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to refresh memoized event line prices"""
+        items = super().create(vals_list)
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return items
+
+    def write(self, vals):
+        """Override write to refresh memoized event line prices"""
+        result = super().write(vals)
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
+
+    def unlink(self):
+        """Override unlink to refresh memoized event line prices"""
+        result = super().unlink()
+        self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
+
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from odoo import api, fields, models, _
+from odoo.addons.website_event_ticket_store.tools.instrumentation import instrumented
 
 
 class ProductProduct(models.Model):
@@ -10,9 +11,17 @@ class ProductProduct(models.Model):
     event_ticket_id = fields.Many2one(
         'event.event.ticket',
         string='Event Ticket',
+        index='btree_not_null',
         help="Select the specific ticket type for this product variant. Each variant should have its own ticket."
     )
 
+    def write(self, vals):
+        """Override write to refresh memoized event line prices when prices change"""
+        result = super().write(vals)
+        if {'lst_price', 'standard_price'} & set(vals):
+            self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
+
     @api.onchange('product_tmpl_id')
     def _onchange_product_tmpl_id(self):
         """Clear event_ticket_id when product template changes"""
@@ -38,43 +47,24 @@ class ProductProduct(models.Model):
         if not self.event_ticket_id:
             return self.product_tmpl_id._get_event_info()
 
-        return {
-            'event_name': self.event_ticket_id.event_id.name,
-            'event_date_begin': self.event_ticket_id.event_id.date_begin,
-            'event_date_end': self.event_ticket_id.event_id.date_end,
-            'ticket_name': self.event_ticket_id.name,
-            'ticket_price': self.event_ticket_id.price,
-            'ticket_price_reduce': self.event_ticket_id.price_reduce,
-            'seats_available': self.event_ticket_id.seats_available if self.event_ticket_id.seats_limited else None,
-            'seats_limited': self.event_ticket_id.seats_limited,
-            'ticket_description': self.event_ticket_id.description or '',
-            'is_available': self._is_event_ticket_available(),
-        }
+        return self.event_ticket_id._get_store_snapshot().as_event_info()
+
+    def _get_event_snapshot(self):
+        """Return the memoized EventTicketSnapshot of this variant's ticket, or None"""
+        self.ensure_one()
+        return self.event_ticket_id._get_store_snapshot()
+
+    def _get_event_fragment_cache_key(self):
+        """Return the t-cache key of the event info fragments of this variant"""
+        self.ensure_one()
+        key = self.event_ticket_id._get_store_fragment_cache_key()
+        return key and (self.id,) + key
 
+    @instrumented('availability_check')
     def _is_event_ticket_available(self):
         """Check if the event ticket is available for purchase"""
         self.ensure_one()
         if not self.event_ticket_id:
             return False
 
-        ticket = self.event_ticket_id
-        now = fields.Datetime.now()
-
-        # Check if ticket is launched (sale has started)
-        if ticket.start_sale_datetime and ticket.start_sale_datetime > now:
-            return False
-
-        # Check if ticket is expired (sale has ended)
-        if ticket.end_sale_datetime and ticket.end_sale_datetime < now:
-            return False
-
-        # Check if event is not expired
-        if ticket.event_id.date_end and ticket.event_id.date_end < now:
-            return False
-
-        # Check seat availability if limited (0 means unlimited)
-        if ticket.seats_limited and ticket.seats_available <= 0:
-            return False
-
-        return True
-
+        return self.event_ticket_id._is_store_sale_available()
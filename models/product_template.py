@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import pytz
+
 from odoo import api, fields, models, _
+from odoo.tools import date_utils
 
 
 class ProductTemplate(models.Model):
@@ -10,8 +13,23 @@ class ProductTemplate(models.Model):
     event_id = fields.Many2one(
         'event.event',
         string='Event',
+        index='btree_not_null',
         help="Select the event for this product template. Individual variants will have their own tickets."
     )
+    # Stored so the shop can sort and filter event products in SQL
+    event_date_begin = fields.Datetime(
+        related='event_id.date_begin', string='Event Start', store=True, index='btree_not_null',
+    )
+
+    # Values of the ``event_date`` shop facet
+    EVENT_DATE_FACETS = ('today', 'week', 'month', 'upcoming')
+
+    def write(self, vals):
+        """Override write to refresh memoized event line prices when prices change"""
+        result = super().write(vals)
+        if {'list_price', 'standard_price'} & set(vals):
+            self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
 
     @api.onchange('service_tracking')
     def _onchange_service_tracking(self):
@@ -28,21 +46,179 @@ class ProductTemplate(models.Model):
         if not self.event_id:
             return {}
 
+        snapshot = self._get_event_snapshot()
+        if snapshot:
+            return snapshot.as_event_info()
+
         return {
             'event_name': self.event_id.name,
             'event_date_begin': self.event_id.date_begin,
             'event_date_end': self.event_id.date_end,
         }
 
-    def _is_event_ticket_available(self):
-        """Check if the event ticket is available for purchase"""
+    def _get_event_snapshot(self):
+        """Return the EventTicketSnapshot of the first variant that has an event ticket"""
         self.ensure_one()
-        # For product.template, check the first variant that has an event ticket
         variant = self.product_variant_ids.filtered('event_ticket_id')[:1]
         if not variant:
-            return False
+            return None
+        return variant._get_event_snapshot()
+
+    def _get_event_fragment_cache_key(self):
+        """Return the t-cache key of the event info fragments of this product
+
+        The fragment lists every ticket variant, so the key covers all of them.
+        """
+        self.ensure_one()
+        tickets = self.product_variant_ids.event_ticket_id
+        keys = tuple(ticket._get_store_fragment_cache_key() for ticket in tickets)
+        return keys and (self.id,) + keys
+
+    def _is_event_ticket_available(self):
+        """Check if at least one ticket variant is available for purchase"""
+        self.ensure_one()
+        return any(entry['is_available'] for entry in self._get_event_availability_matrix()[self.id])
+
+    def _get_event_availability_matrix(self, pricelist=None):
+        """Return the availability of every ticket variant of the templates
+
+        Maps each template id to a list of dicts, one per variant with an event
+        ticket, giving its attribute combination, status, seats and price. The
+        snapshots and prices of all variants are computed together, so the
+        number of queries does not grow with the number of variants.
+        """
+        variants = self.product_variant_ids.filtered('event_ticket_id')
+        snapshots = variants.event_ticket_id._get_store_snapshots()
+        if pricelist:
+            prices = pricelist._get_products_price(variants, 1.0)
+        else:
+            prices = {variant.id: variant.lst_price for variant in variants}
+        matrix = {template.id: [] for template in self}
+        for variant in variants:
+            snapshot = snapshots[variant.event_ticket_id.id]
+            matrix[variant.product_tmpl_id.id].append({
+                'product_id': variant.id,
+                'ticket_id': snapshot.ticket_id,
+                'ticket_name': snapshot.ticket_name,
+                'combination': variant.product_template_attribute_value_ids.ids,
+                'is_available': snapshot.is_available,
+                'seats_limited': snapshot.seats_limited,
+                'seats_available': snapshot.seats_available,
+                'price': prices[variant.id],
+            })
+        return matrix
+
+    def _get_event_catalog_entries(self):
+        """Serialize event product templates and their variants for the catalog API
+
+        Works on the whole recordset at once so events, tickets and variants
+        are prefetched in batch rather than per product.
+        """
+        snapshots = self.product_variant_ids.event_ticket_id._get_store_snapshots()
+        entries = []
+        for template in self:
+            variants = template.product_variant_ids.filtered('event_ticket_id')
+            entries.append({
+                'id': template.id,
+                'name': template.name,
+                'url': template.website_url,
+                'write_date': fields.Datetime.to_string(template.write_date),
+                'currency': template.currency_id.name,
+                'is_available': any(snapshots[ticket.id].is_available for ticket in variants.event_ticket_id),
+                'event': template.event_id and {
+                    'id': template.event_id.id,
+                    'name': template.event_id.name,
+                    'date_begin': fields.Datetime.to_string(template.event_id.date_begin),
+                    'date_end': fields.Datetime.to_string(template.event_id.date_end),
+                } or None,
+                'variants': [{
+                    'id': variant.id,
+                    'name': variant.display_name,
+                    'price': variant.lst_price,
+                    'ticket': {
+                        'id': variant.event_ticket_id.id,
+                        'name': snapshots[variant.event_ticket_id.id].ticket_name,
+                        'seats_limited': snapshots[variant.event_ticket_id.id].seats_limited,
+                        'seats_available': snapshots[variant.event_ticket_id.id].seats_available,
+                    },
+                    'is_available': snapshots[variant.event_ticket_id.id].is_available,
+                } for variant in variants],
+            })
+        return entries
+
+    def _sync_event_ticket_prices(self):
+        """Price the variants of templates provisioned with the "Event Ticket" attribute
 
-        return variant._is_event_ticket_available()
+        The template costs the cheapest ticket and each variant adds the
+        difference with its own ticket as the price extra of its value.
+        """
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket')
+        for template in self:
+            variants = template.product_variant_ids.filtered('event_ticket_id')
+            if not variants:
+                continue
+            base_price = min(variants.event_ticket_id.mapped('price'))
+            if template.list_price != base_price:
+                template.with_context(skip_price_sync=True).write({'list_price': base_price})
+            for variant in variants:
+                ticket_value = variant.product_template_attribute_value_ids.filtered(
+                    lambda value: value.attribute_id == attribute
+                )
+                price_extra = variant.event_ticket_id.price - base_price
+                if ticket_value and ticket_value.price_extra != price_extra:
+                    ticket_value.price_extra = price_extra
+
+    @api.model
+    def _get_event_facet_domain(self, event_date=None, event_available=False, event_id=None):
+        """Domain of the event facets of the shop search
+
+        Every facet is a plain domain, so the shop's search count and pager
+        stay exact. Days, weeks and months follow the visitor's timezone.
+        """
+        domain = []
+        if event_date in self.EVENT_DATE_FACETS:
+            now = fields.Datetime.now()
+            if event_date == 'upcoming':
+                domain.append(('event_date_begin', '>=', now))
+            else:
+                granularity = {'today': 'day', 'week': 'week', 'month': 'month'}[event_date]
+                try:
+                    tz = pytz.timezone(self.env.context.get('tz') or self.env.user.tz or 'UTC')
+                except pytz.UnknownTimeZoneError:
+                    tz = pytz.utc
+                local_now = pytz.utc.localize(now).astimezone(tz).replace(tzinfo=None)
+                # Local bounds are stored back as naive UTC datetimes
+                start, end = (
+                    tz.localize(bound).astimezone(pytz.utc).replace(tzinfo=None)
+                    for bound in (date_utils.start_of(local_now, granularity), date_utils.end_of(local_now, granularity))
+                )
+                domain += [
+                    ('event_date_begin', '>=', start),
+                    ('event_date_begin', '<=', end),
+                ]
+        if event_available:
+            Ticket = self.env['event.event.ticket']
+            domain.append(('product_variant_ids', 'any', [('event_ticket_id', 'any', (
+                Ticket._get_store_available_domain()
+                + [('id', 'not in', Ticket._get_store_sold_out_query())]
+            ))]))
+        if event_id:
+            domain.append(('event_id', '=', event_id))
+        return domain
+
+    @api.model
+    def _search_get_detail(self, website, order, options):
+        """Add the event facets to the shop search"""
+        result = super()._search_get_detail(website, order, options)
+        if result['model'] == 'product.template':
+            facet_domain = self._get_event_facet_domain(
+                event_date=options.get('event_date'),
+                event_available=options.get('event_available'),
+                event_id=options.get('event_id'),
+            )
+            if facet_domain:
+                result['base_domain'].append(facet_domain)
+        return result
 
     @api.model
     def _get_saleable_tracking_types(self):
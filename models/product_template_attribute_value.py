@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class ProductTemplateAttributeValue(models.Model):
+    _inherit = 'product.template.attribute.value'
+
+    def write(self, vals):
+        """Override write to refresh memoized event line prices when price extras change"""
+        result = super().write(vals)
+        if 'price_extra' in vals:
+            self.env['sale.order.line']._invalidate_event_price_memo()
+        return result
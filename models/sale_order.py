@@ -1,20 +1,47 @@
 # -*- coding: utf-8 -*-
 
+from datetime import timedelta
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-import uuid
+from odoo.addons.website_event_ticket_store.tools import metrics
+from odoo.addons.website_event_ticket_store.tools.access_tokens import sign_attendee_token
+from odoo.addons.website_event_ticket_store.tools.instrumentation import instrumented, store_span
 import logging
 
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
+    # System parameters of the abandoned cart reaper, in days (0 disables the rule)
+    ABANDONED_CART_DAYS_PARAM = 'website_event_ticket_store.abandoned_cart_days'
+    ENDED_EVENT_CART_DAYS_PARAM = 'website_event_ticket_store.ended_event_cart_days'
+    DEFAULT_ABANDONED_CART_DAYS = 7
+    DEFAULT_ENDED_EVENT_CART_DAYS = 1
+    # Number of carts cancelled per transaction by the reaper
+    CART_REAPER_BATCH_SIZE = 200
+
     attendee_access_token = fields.Char(
         string='Attendee Details Access Token',
         copy=False,
         help='Token to access the attendee details page after payment'
     )
+    attendee_details_pending = fields.Boolean(
+        string='Attendee Details Pending',
+        compute='_compute_attendee_details_pending',
+        help='Paid or free event order waiting for its attendee details'
+    )
+
+    @api.depends('state', 'amount_total', 'order_line.registration_ids', 'transaction_ids.state')
+    def _compute_attendee_details_pending(self):
+        awaiting_orders = self.filtered(lambda order: order.id and order.state in ('draft', 'sent'))._filter_awaiting_attendee_details()
+        for order in self:
+            order.attendee_details_pending = order in awaiting_orders and (
+                not order.amount_total
+                or any(tx.state in ('authorized', 'done') for tx in order.transaction_ids)
+            )
 
+    @instrumented('cart_update')
     def _cart_update(self, product_id, line_id=None, add_qty=0, set_qty=0, **kwargs):
         """Override to handle event ticket validation and ensure event fields are set"""
         self.ensure_one()
@@ -24,6 +51,7 @@ class SaleOrder(models.Model):
         if product.service_tracking == 'event':
             # Validate that the product has event and ticket configured
             if not product.product_tmpl_id.event_id or not product.event_ticket_id:
+                metrics.CART_REJECTIONS.inc(reason='misconfigured')
                 raise UserError(_(
                     "This event product is not properly configured. "
                     "Please contact the administrator to set up the event and ticket information."
@@ -31,6 +59,7 @@ class SaleOrder(models.Model):
 
             # Check if the event ticket is available
             if not product._is_event_ticket_available():
+                metrics.CART_REJECTIONS.inc(reason='unavailable')
                 raise UserError(_(
                     "This event ticket is no longer available for purchase. "
                     "The event may be sold out or expired."
@@ -105,11 +134,115 @@ class SaleOrder(models.Model):
         super()._validate_order()
 
     def _generate_attendee_access_token(self):
-        """Generate a unique access token for attendee details page"""
+        """Return the access token of the attendee details page
+
+        Signed tokens are an HMAC of the order id, computed on demand and never
+        stored. Orders created before signed tokens keep their stored token.
+        """
+        self.ensure_one()
+        return self.attendee_access_token or sign_attendee_token(self.env, self.id)
+
+    def _get_event_checkout_errors(self):
+        """Revalidate every event line of the cart before payment
+
+        Returns a dict mapping sale.order.line records to the reason they can
+        no longer be bought. Ticket availability is checked in batch, so the
+        cost does not grow with the number of lines.
+        """
         self.ensure_one()
-        if not self.attendee_access_token:
-            self.attendee_access_token = str(uuid.uuid4())
-        return self.attendee_access_token
+        event_lines = self.order_line.filtered(lambda line: line.product_id.service_tracking == 'event')
+        tickets = event_lines.event_ticket_id
+        available_tickets = tickets._filter_store_sale_available()
+
+        # Quantities ordered per ticket, over all the lines sharing it
+        requested_seats = {}
+        for line in event_lines:
+            requested_seats[line.event_ticket_id] = requested_seats.get(line.event_ticket_id, 0) + line.product_uom_qty
+
+        errors = {}
+        for line in event_lines:
+            ticket = line.event_ticket_id
+            if not ticket:
+                errors[line] = _("%s is not properly configured and cannot be bought.", line.product_id.display_name)
+            elif ticket not in available_tickets:
+                errors[line] = _("%s is no longer available for purchase.", ticket.display_name)
+            elif ticket.seats_limited and requested_seats[ticket] > ticket.seats_available:
+                errors[line] = _(
+                    "Only %(seats)s seat(s) left for %(ticket)s.",
+                    seats=ticket.seats_available, ticket=ticket.display_name,
+                )
+        return errors
+
+    @api.model
+    def _create_box_office_order(self, partner, seat_lines, journal):
+        """Sell event tickets at the venue in a single transaction
+
+        ``seat_lines`` is a list of ``(product, attendees)`` pairs, where
+        ``attendees`` holds one dict of registration values (name, email,
+        phone) per seat. The order, its lines and registrations are created,
+        the seats are checked like at checkout, then the order is confirmed,
+        invoiced and paid with ``journal``. Any failure rolls everything back.
+        """
+        # A savepoint keeps the sale atomic even when the caller catches the error
+        with self.env.cr.savepoint():
+            for product, attendees in seat_lines:
+                if product.service_tracking != 'event' or not product.event_ticket_id:
+                    raise UserError(_("%s is not an event ticket product.", product.display_name))
+                if not attendees:
+                    raise UserError(_("No seat requested for %s.", product.display_name))
+
+            order = self.create({'partner_id': partner.id})
+            lines = self.env['sale.order.line'].create([{
+                'order_id': order.id,
+                'product_id': product.id,
+                'product_uom_qty': len(attendees),
+                'event_id': product.product_tmpl_id.event_id.id,
+                'event_ticket_id': product.event_ticket_id.id,
+            } for product, attendees in seat_lines])
+
+            errors = order._get_event_checkout_errors()
+            if errors:
+                raise UserError('\n'.join(errors.values()))
+
+            self.env['event.registration'].create([{
+                'event_id': line.event_id.id,
+                'event_ticket_id': line.event_ticket_id.id,
+                'sale_order_id': order.id,
+                'sale_order_line_id': line.id,
+                'name': attendee.get('name') or partner.name,
+                'email': attendee.get('email') or partner.email,
+                'phone': attendee.get('phone') or partner.phone,
+                'state': 'open',
+            } for line, (__, attendees) in zip(lines, seat_lines) for attendee in attendees])
+            order.with_context(skip_attendee_validation=True).action_confirm()
+
+            if order.amount_total:
+                invoices = order._create_invoices()
+                invoices.action_post()
+                self.env['account.payment.register'].with_context(
+                    active_model='account.move', active_ids=invoices.ids,
+                ).create({'journal_id': journal.id}).action_create_payments()
+        return order
+
+    def _filter_awaiting_attendee_details(self):
+        """Return the orders with event lines of which none has a registration yet
+
+        Batch equivalent of the per-order event line and registration checks,
+        answered with two grouped queries whatever the number of orders.
+        """
+        if not self:
+            return self
+        SaleOrderLine = self.env['sale.order.line']
+        event_line_domain = [
+            ('order_id', 'in', self.ids),
+            ('product_id.service_tracking', '=', 'event'),
+        ]
+        event_orders = SaleOrderLine._read_group(event_line_domain, ['order_id'])
+        registered_orders = SaleOrderLine._read_group(
+            event_line_domain + [('registration_ids', '!=', False)], ['order_id'],
+        )
+        awaiting_ids = {order.id for [order] in event_orders} - {order.id for [order] in registered_orders}
+        return self.filtered(lambda order: order.id in awaiting_ids)
 
     def _has_pending_attendee_details(self):
         """Check if this order has event tickets without attendee registrations"""
@@ -123,23 +256,20 @@ class SaleOrder(models.Model):
     def get_attendee_details_url(self):
         """Get the URL to complete attendee details"""
         self.ensure_one()
-        if not self.attendee_access_token:
-            self._generate_attendee_access_token()
+        # Signed tokens are valid without being stored, so reading the URL never writes
+        token = self._generate_attendee_access_token()
         base_url = self.get_base_url()
-        return f"{base_url}/my/orders/{self.id}/attendee-details/{self.attendee_access_token}"
+        return f"{base_url}/my/orders/{self.id}/attendee-details/{token}"
 
     def action_send_attendee_details_reminder(self):
         """Manual action to send attendee details reminder email"""
         for order in self:
             if order._has_pending_attendee_details():
-                # Generate token if it doesn't exist
-                if not order.attendee_access_token:
-                    order._generate_attendee_access_token()
-
                 # Send the reminder email
                 template = self.env.ref('website_event_ticket_store.mail_template_attendee_details_reminder', raise_if_not_found=False)
                 if template:
                     template.send_mail(order.id, force_send=True, email_values={'email_to': order.partner_id.email})
+                    metrics.REMINDERS_SENT.inc()
 
         return {
             'type': 'ir.actions.client',
@@ -163,34 +293,99 @@ class SaleOrder(models.Model):
         - Are in draft/sent state
         - Haven't received a reminder in the last 24 hours (optional)
         """
-        # Find orders with pending attendee details
-        domain = [
+        with store_span(self.env, 'reminder_cron') as span:
+            # Find orders with pending attendee details
+            domain = [
+                ('state', 'in', ['draft', 'sent']),
+                ('order_line.product_id.service_tracking', '=', 'event'),
+            ]
+
+            # Orders with pending attendee details and a successful payment, checked in batch
+            orders_to_remind = self.search(domain)._filter_awaiting_attendee_details().filtered(
+                lambda order: any(tx.state in ['done', 'authorized'] for tx in order.transaction_ids)
+            )
+            # Send reminder emails, rendered together and sent to each customer by the template
+            template = self.env.ref('website_event_ticket_store.mail_template_attendee_details_reminder', raise_if_not_found=False)
+            if template:
+                template.send_mail_batch(orders_to_remind.ids, force_send=False)
+                metrics.REMINDERS_SENT.inc(len(orders_to_remind))
+            span.records = len(orders_to_remind)
+
+            _logger = logging.getLogger(__name__)
+            _logger.info(f'Sent {len(orders_to_remind)} attendee details reminder emails')
+
+        return True
+
+    def _get_reaper_threshold(self, param, default):
+        """Return the cutoff datetime of a reaper rule, or None when disabled"""
+        try:
+            days = int(self.env['ir.config_parameter'].sudo().get_param(param, default))
+        except ValueError:
+            days = default
+        if days <= 0:
+            return None
+        return fields.Datetime.now() - timedelta(days=days)
+
+    def _get_reapable_event_cart_domains(self):
+        """Return the domains of unpaid event carts to cancel, by reason"""
+        base_domain = [
             ('state', 'in', ['draft', 'sent']),
+            ('website_id', '!=', False),
             ('order_line.product_id.service_tracking', '=', 'event'),
         ]
+        domains = {}
+        abandoned_before = self._get_reaper_threshold(
+            self.ABANDONED_CART_DAYS_PARAM, self.DEFAULT_ABANDONED_CART_DAYS,
+        )
+        if abandoned_before:
+            domains['abandoned'] = base_domain + [('write_date', '<', abandoned_before)]
+        ended_before = self._get_reaper_threshold(
+            self.ENDED_EVENT_CART_DAYS_PARAM, self.DEFAULT_ENDED_EVENT_CART_DAYS,
+        )
+        if ended_before:
+            # Every event of the cart ended before the threshold
+            domains['event_ended'] = base_domain + [
+                ('order_line.event_id.date_end', '<', ended_before),
+                '!', ('order_line.event_id.date_end', '>=', ended_before),
+            ]
+        return domains
 
-        orders = self.search(domain)
-        orders_to_remind = self.env['sale.order']
-
-        for order in orders:
-            # Check if this order has pending attendee details
-            if order._has_pending_attendee_details():
-                # Check if there's a successful payment transaction
-                tx = order.get_portal_last_transaction()
-                if tx and tx.state in ['done', 'authorized']:
-                    # Generate token if missing
-                    if not order.attendee_access_token:
-                        order._generate_attendee_access_token()
-                    orders_to_remind |= order
-
-        # Send reminder emails
-        template = self.env.ref('website_event_ticket_store.mail_template_attendee_details_reminder', raise_if_not_found=False)
-        if template:
-            for order in orders_to_remind:
-                template.send_mail(order.id, force_send=False, email_values={'email_to': order.partner_id.email})
+    @api.model
+    def _cron_reap_abandoned_event_carts(self, batch_size=None, auto_commit=True):
+        """Scheduled action cancelling unpaid event carts that can no longer be completed
+
+        Carts untouched for too long and carts whose events are over are
+        cancelled in batches. Carts with a pending, authorized or done payment
+        and free carts held for their attendee details are kept, as the
+        customer completed checkout. Cancelling also cancels the registrations
+        of the carts, releasing their seats.
+        """
+        batch_size = batch_size or self.CART_REAPER_BATCH_SIZE
+        paid_states = ['pending', 'authorized', 'done']
+        reaped_count = 0
+        with store_span(self.env, 'cart_reaper') as span:
+            for reason, domain in self._get_reapable_event_cart_domains().items():
+                # Paid and held carts are skipped for good, so they are excluded from later batches
+                skipped_ids = []
+                while True:
+                    carts = self.search(domain + [('id', 'not in', skipped_ids)], limit=batch_size, order='id')
+                    if not carts:
+                        break
+                    paid_carts = self.search([('id', 'in', carts.ids), ('transaction_ids.state', 'in', paid_states)])
+                    # Free orders never get a transaction, same rule as attendee_details_pending
+                    held_carts = (carts - paid_carts).filtered(lambda cart: not cart.amount_total)._filter_awaiting_attendee_details()
+                    skipped_ids += (paid_carts | held_carts).ids
+                    carts -= paid_carts | held_carts
+                    if carts:
+                        carts._action_cancel()
+                        metrics.CARTS_REAPED.inc(len(carts), reason=reason)
+                        reaped_count += len(carts)
+                    if auto_commit:
+                        self.env.cr.commit()
+            span.records = reaped_count
 
         _logger = logging.getLogger(__name__)
-        _logger.info(f'Sent {len(orders_to_remind)} attendee details reminder emails')
+        _logger.info(f'Cancelled {reaped_count} abandoned event carts')
 
         return True
 
@@ -229,6 +424,7 @@ class SaleOrder(models.Model):
         if template:
             for order in fixed_orders:
                 template.send_mail(order.id, force_send=True, email_values={'email_to': order.partner_id.email})
+            metrics.REMINDERS_SENT.inc(len(fixed_orders))
 
         _logger = logging.getLogger(__name__)
         _logger.info(f'Fixed {len(fixed_orders)} legacy orders without tokens')
@@ -7,6 +7,8 @@ from odoo.exceptions import ValidationError
 class SaleOrderLine(models.Model):
     _inherit = 'sale.order.line'
 
+    _EVENT_PRICE_MEMO_KEY = 'website_event_ticket_store.event_line_prices'
+
     # Override the existing fields to make them not computed and allow manual setting
     event_id = fields.Many2one(
         'event.event',
@@ -24,51 +26,66 @@ class SaleOrderLine(models.Model):
     @api.constrains('event_id', 'event_ticket_id', 'product_id')
     def _check_event_registration_ticket(self):
         """Override validation to skip reward lines - they don't need event fields immediately"""
-        for so_line in self:
-            # Skip validation for reward lines (coupon/discount lines)
-            # These are discount lines and event details will be collected after payment
-            # Check reward_id directly since is_reward_line is computed and may not be available during validation
-            if so_line.reward_id or so_line.is_reward_line:
-                continue
-
-            # For regular order lines, enforce the validation
-            if so_line.product_id.service_tracking == "event" and (not so_line.event_id or not so_line.event_ticket_id):
-                raise ValidationError(
-                    _("The sale order line with the product %(product_name)s needs an event and a ticket.",
-                      product_name=so_line.product_id.name))
+        # Skip validation for reward lines (coupon/discount lines)
+        # These are discount lines and event details will be collected after payment
+        # Check reward_id directly since is_reward_line is computed and may not be available during validation
+        # The whole batch is filtered at once, so products and rewards are prefetched together
+        invalid_lines = self.filtered(lambda so_line: (
+            so_line.product_id.service_tracking == "event"
+            and (not so_line.event_id or not so_line.event_ticket_id)
+            and not (so_line.reward_id or so_line.is_reward_line)
+        ))
+        if invalid_lines:
+            raise ValidationError(
+                _("The sale order line with the product %(product_name)s needs an event and a ticket.",
+                  product_name=invalid_lines[0].product_id.name))
+
+    @api.model
+    def _get_reward_line_event_values(self, products):
+        """Return the event fields of reward lines by product id, for the event products among products"""
+        return {
+            product.id: {
+                'event_id': product.product_tmpl_id.event_id.id,
+                'event_ticket_id': product.event_ticket_id.id,
+            }
+            for product in products if product.service_tracking == 'event'
+        }
 
     @api.model_create_multi
     def create(self, vals_list):
         """Override create to set event fields for reward lines with event products"""
         # Set event fields for reward lines if they're event products
-        for vals in vals_list:
-            if vals.get('is_reward_line') or vals.get('reward_id'):
-                product_id = vals.get('product_id')
-                if product_id:
-                    product = self.env['product.product'].browse(product_id)
-                    if product.service_tracking == 'event':
-                        # Set event fields from product configuration for reward lines
-                        if not vals.get('event_id') and product.product_tmpl_id.event_id:
-                            vals['event_id'] = product.product_tmpl_id.event_id.id
-                        if not vals.get('event_ticket_id') and product.event_ticket_id:
-                            vals['event_ticket_id'] = product.event_ticket_id.id
+        reward_vals_list = [
+            vals for vals in vals_list
+            if (vals.get('is_reward_line') or vals.get('reward_id')) and vals.get('product_id')
+        ]
+        if reward_vals_list:
+            # One browse prefetches the products and template events of the whole batch
+            products = self.env['product.product'].browse({vals['product_id'] for vals in reward_vals_list})
+            event_values = self._get_reward_line_event_values(products)
+            for vals in reward_vals_list:
+                for field_name, value in event_values.get(vals['product_id'], {}).items():
+                    # Set event fields from product configuration for reward lines
+                    if not vals.get(field_name) and value:
+                        vals[field_name] = value
 
         return super().create(vals_list)
 
     def write(self, vals):
         """Override write to set event fields for reward lines when product is updated"""
         # If updating product_id on reward lines, set event fields
-        if 'product_id' in vals:
-            # Check if any of the records being written are reward lines
-            is_reward_line = vals.get('is_reward_line') or vals.get('reward_id') or any(self.mapped('is_reward_line')) or any(self.mapped('reward_id'))
-            if is_reward_line:
-                product = self.env['product.product'].browse(vals['product_id'])
-                if product.service_tracking == 'event':
+        if vals.get('product_id'):
+            # The product is checked first, so writes of other products never scan the lines
+            product = self.env['product.product'].browse(vals['product_id'])
+            event_values = self._get_reward_line_event_values(product).get(product.id)
+            if event_values and (
+                vals.get('is_reward_line') or vals.get('reward_id')
+                or any(line.is_reward_line or line.reward_id for line in self)
+            ):
+                for field_name, value in event_values.items():
                     # Set event fields from product configuration for reward lines
-                    if 'event_id' not in vals and product.product_tmpl_id.event_id:
-                        vals['event_id'] = product.product_tmpl_id.event_id.id
-                    if 'event_ticket_id' not in vals and product.event_ticket_id:
-                        vals['event_ticket_id'] = product.event_ticket_id.id
+                    if field_name not in vals and value:
+                        vals[field_name] = value
 
         return super().write(vals)
 
@@ -98,32 +115,55 @@ class SaleOrderLine(models.Model):
                 return self._get_combo_item_display_price()
 
             # Use the original pricing logic without event ticket override
-            pricelist_price = self._get_pricelist_price()
+            pricelist_price, base_price = self._get_event_pricelist_prices()
 
-            if not self.pricelist_item_id._show_discount():
+            if base_price is None:
                 # No pricelist rule found => no discount from pricelist
                 return pricelist_price
 
-            base_price = self._get_pricelist_price_before_discount()
-
             # negative discounts (= surcharge) are included in the display price
             return max(base_price, pricelist_price)
 
         return super()._get_display_price()
 
+    def _get_event_pricelist_prices(self):
+        """Return the pricelist price of the event line and its price before discount
+
+        The price before discount is None when the pricelist rule shows no
+        discount. Both are memoized on the cursor for lines sharing product,
+        pricelist, quantity, currency, company and date, so large carts and loyalty
+        recomputations evaluate each pricelist rule once. Writes on prices
+        and pricelists call _invalidate_event_price_memo.
+        """
+        self.ensure_one()
+        memo = self.env.cr.cache.setdefault(self._EVENT_PRICE_MEMO_KEY, {})
+        key = (
+            self.product_id.id,
+            self.order_id.pricelist_id.id,
+            self.pricelist_item_id.id,
+            self.product_uom_qty or 1.0,
+            self.product_uom.id,
+            self.currency_id.id,
+            self.company_id.id,
+            self.order_id.date_order,
+            tuple(self.product_no_variant_attribute_value_ids.ids),
+        )
+        if key not in memo:
+            pricelist_price = self._get_pricelist_price()
+            base_price = None
+            if self.pricelist_item_id._show_discount():
+                base_price = self._get_pricelist_price_before_discount()
+            memo[key] = (pricelist_price, base_price)
+        return memo[key]
+
+    @api.model
+    def _invalidate_event_price_memo(self):
+        """Drop memoized event line prices after a price or pricelist change"""
+        self.env.cr.cache.pop(self._EVENT_PRICE_MEMO_KEY, None)
+
     def _get_event_info(self):
         """Get event information for display purposes"""
         self.ensure_one()
         if self.event_id and self.event_ticket_id:
-            return {
-                'event_name': self.event_id.name,
-                'event_date_begin': self.event_id.date_begin,
-                'event_date_end': self.event_id.date_end,
-                'ticket_name': self.event_ticket_id.name,
-                'ticket_price': self.event_ticket_id.price,
-                'ticket_price_reduce': self.event_ticket_id.price_reduce,
-                'seats_available': self.event_ticket_id.seats_available if self.event_ticket_id.seats_limited else None,
-                'seats_limited': self.event_ticket_id.seats_limited,
-                'ticket_description': self.event_ticket_id.description or '',
-            }
+            return self.event_ticket_id._get_store_snapshot().as_event_info()
         return {}
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, _
 
 
 class Website(models.Model):
@@ -10,3 +10,7 @@ class Website(models.Model):
         """Remove event attendee collection from checkout process - now handled after payment"""
         # Simply return the parent steps without adding attendee collection
         return super()._get_checkout_step_list()
+
+    def _get_product_sort_mapping(self):
+        """Let the shop sort products by event date"""
+        return super()._get_product_sort_mapping() + [('event_date_begin asc', _('Event Date'))]
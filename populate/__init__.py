@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import event_event
+from . import event_event_ticket
+from . import product
+from . import sale_order
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import fields, models
+from odoo.tools import populate
+
+
+class EventEvent(models.Model):
+    _inherit = 'event.event'
+
+    _populate_sizes = {'small': 10, 'medium': 100, 'large': 1_000}
+
+    def _populate_factories(self):
+        now = fields.Datetime.now()
+
+        def compute_date_begin(random, **kwargs):
+            # Mostly upcoming events, with some already over
+            return now + timedelta(days=random.randint(-60, 365), hours=random.randint(8, 18))
+
+        def compute_date_end(random, values, **kwargs):
+            return values['date_begin'] + timedelta(days=random.randint(0, 3), hours=random.randint(1, 8))
+
+        return [
+            ('name', populate.constant('event_store_event_{counter}')),
+            ('date_begin', populate.compute(compute_date_begin)),
+            ('date_end', populate.compute(compute_date_end)),
+            ('website_published', populate.iterate([True, False], [0.9, 0.1])),
+            ('redirect_to_store', populate.iterate([True, False], [0.5, 0.5])),
+        ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import models
+from odoo.tools import populate
+
+
+class EventEventTicket(models.Model):
+    _inherit = 'event.event.ticket'
+
+    _populate_sizes = {'small': 50, 'medium': 1_000, 'large': 10_000}
+    _populate_dependencies = ['event.event']
+
+    def _populate_factories(self):
+        event_ids = self.env.registry.populated_models['event.event']
+        events = self.env['event.event'].browse(event_ids)
+        date_begin_by_event = {event.id: event.date_begin for event in events}
+
+        def compute_start_sale(random, values, **kwargs):
+            if random.random() < 0.3:
+                return False
+            return date_begin_by_event[values['event_id']] - timedelta(days=random.randint(1, 120))
+
+        def compute_end_sale(random, values, **kwargs):
+            if not values['start_sale_datetime']:
+                return False
+            return date_begin_by_event[values['event_id']] - timedelta(hours=random.randint(0, 48))
+
+        return [
+            ('event_id', populate.randomize(event_ids)),
+            ('name', populate.iterate(['Standard', 'VIP', 'Student', 'Early Bird', 'Group', 'Day Pass'])),
+            ('price', populate.randfloat(0, 1_500)),
+            # 0 means unlimited seats
+            ('seats_max', populate.iterate([0, 10, 100, 1_000], [0.4, 0.1, 0.3, 0.2])),
+            ('start_sale_datetime', populate.compute(compute_start_sale)),
+            ('end_sale_datetime', populate.compute(compute_end_sale)),
+        ]
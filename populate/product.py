@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models
+from odoo.tools import populate
+
+_logger = logging.getLogger(__name__)
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    _populate_dependencies = ['product.attribute.value', 'product.category', 'event.event.ticket']
+
+    def _populate_factories(self):
+        event_ids = self.env.registry.populated_models['event.event']
+
+        def compute_service_tracking(random, values, **kwargs):
+            # Turn a share of the generated services into event products
+            if values.get('type') == 'service' and random.random() < 0.5:
+                return 'event'
+            return values.get('service_tracking', 'no')
+
+        def compute_event_id(random, values, **kwargs):
+            if values['service_tracking'] != 'event':
+                return False
+            return random.choice(event_ids)
+
+        return super()._populate_factories() + [
+            ('service_tracking', populate.compute(compute_service_tracking)),
+            ('event_id', populate.compute(compute_event_id)),
+            ('sale_ok', populate.compute(lambda values, **kwargs: values.get('sale_ok', True) or values['service_tracking'] == 'event')),
+        ]
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    _populate_dependencies = ['product.category', 'product.template', 'event.event.ticket']
+
+    def _populate(self, size):
+        """Give every generated event template one variant per ticket of its event
+
+        Variants come from the "Event Ticket" attribute, as for provisioned
+        store products, since variants need distinct attribute combinations.
+        """
+        records = super()._populate(size)
+
+        template_ids = self.env.registry.populated_models['product.template']
+        templates = self.env['product.template'].browse(template_ids).filtered(
+            lambda template: template.service_tracking == 'event' and template.event_id.event_ticket_ids
+        )
+        attribute = self.env.ref('website_event_ticket_store.product_attribute_event_ticket')
+        Event = self.env['event.event']
+        value_by_ticket = Event._get_store_ticket_values(templates.event_id.event_ticket_ids)
+
+        _logger.info('Linking event tickets to %s event product templates', len(templates))
+        for template in templates:
+            template.write({'attribute_line_ids': [(0, 0, {
+                'attribute_id': attribute.id,
+                'value_ids': [(6, 0, [value_by_ticket[ticket].id for ticket in template.event_id.event_ticket_ids])],
+            })]})
+        Event._link_store_ticket_variants(templates, value_by_ticket)
+        # Adding the attribute replaces the variants created without combination
+        return records.exists() | templates.product_variant_ids
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import models
+from odoo.tools import populate
+
+_logger = logging.getLogger(__name__)
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    def _populate_factories(self):
+        # Most event orders come from the website store
+        website = self.env['website'].search([], limit=1)
+        return super()._populate_factories() + [
+            ('website_id', populate.iterate([website.id, False], [0.8, 0.2])),
+        ]
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    _populate_dependencies = ['sale.order', 'product.product', 'event.event.ticket']
+
+    def _populate_factories(self):
+        event_products = self.env['product.product'].search([
+            ('id', 'in', self.env.registry.populated_models['product.product']),
+            ('service_tracking', '=', 'event'),
+            ('event_ticket_id', '!=', False),
+        ])
+        ticket_by_product = {product.id: product.event_ticket_id for product in event_products}
+
+        def compute_event_id(values, **kwargs):
+            ticket = ticket_by_product.get(values['product_id'])
+            return ticket.event_id.id if ticket else False
+
+        def compute_event_ticket_id(values, **kwargs):
+            ticket = ticket_by_product.get(values['product_id'])
+            return ticket.id if ticket else False
+
+        return super()._populate_factories() + [
+            ('event_id', populate.compute(compute_event_id)),
+            ('event_ticket_id', populate.compute(compute_event_ticket_id)),
+        ]
+
+    def _populate(self, size):
+        """Pay part of the generated event carts and register attendees on some of them
+
+        This leaves a realistic mix of abandoned carts, paid orders waiting for
+        attendee details and completed registrations.
+        """
+        records = super()._populate(size)
+        random = populate.Random('website_event_ticket_store_sale_order_line')
+
+        orders = records.order_id.filtered(
+            lambda order: order.state in ('draft', 'sent')
+            and order.order_line.filtered(lambda line: line.product_id.service_tracking == 'event')
+        )
+        paid_orders = orders.filtered(lambda order: random.random() < 0.6)
+        if not paid_orders:
+            return records
+
+        provider = self.env['payment.provider'].search([('code', '=', 'none')], limit=1) or \
+            self.env['payment.provider'].create({'name': 'Populate Provider', 'code': 'none', 'state': 'test'})
+        _logger.info('Creating payment transactions for %s event orders', len(paid_orders))
+        self.env['payment.transaction'].create([{
+            'provider_id': provider.id,
+            'payment_method_id': self.env.ref('payment.payment_method_unknown').id,
+            'reference': f'POPULATE-{order.id}',
+            'amount': order.amount_total,
+            'currency_id': order.currency_id.id,
+            'partner_id': order.partner_id.id,
+            'sale_order_ids': [(6, 0, order.ids)],
+            'state': 'done',
+        } for order in paid_orders])
+
+        registered_orders = paid_orders.filtered(lambda order: random.random() < 0.5)
+        _logger.info('Registering attendees for %s event orders', len(registered_orders))
+        registration_vals = []
+        for order in registered_orders:
+            for line in order.order_line.filtered('event_ticket_id'):
+                registration_vals += [{
+                    'event_id': line.event_id.id,
+                    'event_ticket_id': line.event_ticket_id.id,
+                    'sale_order_id': order.id,
+                    'sale_order_line_id': line.id,
+                    'name': f'{order.partner_id.name} {index + 1}',
+                    'email': order.partner_id.email,
+                    'state': 'draft',
+                } for index in range(int(line.product_uom_qty))]
+        self.env['event.registration'].create(registration_vals)
+        registered_orders.with_context(skip_attendee_validation=True).action_confirm()
+        return records
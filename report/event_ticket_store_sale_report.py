@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class EventTicketStoreSaleReport(models.Model):
+    _name = 'event.ticket.store.sale.report'
+    _description = 'Event Ticket Store Sales Analysis'
+    _auto = False
+    _rec_name = 'event_ticket_id'
+    _order = 'date desc'
+
+    date = fields.Date(string='Order Date', readonly=True)
+    event_id = fields.Many2one('event.event', string='Event', readonly=True)
+    event_ticket_id = fields.Many2one('event.event.ticket', string='Ticket', readonly=True)
+    product_id = fields.Many2one('product.product', string='Product Variant', readonly=True)
+    product_tmpl_id = fields.Many2one('product.template', string='Product', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    sold_qty = fields.Float(string='Sold', readonly=True)
+    paid_qty = fields.Float(string='Paid', readonly=True)
+    revenue = fields.Monetary(string='Revenue', currency_field='currency_id', readonly=True)
+    pending_attendee_seats = fields.Float(string='Seats Pending Attendee Details', readonly=True)
+    registration_count = fields.Integer(string='Registrations', readonly=True)
+
+    def _query(self):
+        """Aggregate event order lines per day, event, ticket and variant
+
+        Sold quantities and revenue come from confirmed orders, in company
+        currency. Paid quantities include quotations waiting for their
+        attendee details. Pending seats follow the rule of
+        sale.order.attendee_details_pending: quotations, paid or free, of
+        which no event line has a registration yet.
+        """
+        return SQL("""
+            WITH paid_orders AS (
+                SELECT DISTINCT rel.sale_order_id AS order_id
+                  FROM sale_order_transaction_rel rel
+                  JOIN payment_transaction tx ON tx.id = rel.transaction_id
+                 WHERE tx.state IN ('authorized', 'done')
+            ), registered_orders AS (
+                SELECT DISTINCT registered_line.order_id
+                  FROM sale_order_line registered_line
+                  JOIN event_registration registration ON registration.sale_order_line_id = registered_line.id
+                 WHERE registration.active
+            ), line_registrations AS (
+                SELECT sale_order_line_id, COUNT(*) AS registration_count
+                  FROM event_registration
+                 WHERE sale_order_line_id IS NOT NULL AND state != 'cancel'
+              GROUP BY sale_order_line_id
+            )
+            SELECT MIN(sol.id) AS id,
+                   so.date_order::date AS date,
+                   sol.event_id,
+                   sol.event_ticket_id,
+                   sol.product_id,
+                   pp.product_tmpl_id,
+                   so.company_id,
+                   company.currency_id,
+                   SUM(CASE WHEN so.state = 'sale' THEN sol.product_uom_qty ELSE 0 END) AS sold_qty,
+                   SUM(CASE WHEN po.order_id IS NOT NULL THEN sol.product_uom_qty ELSE 0 END) AS paid_qty,
+                   SUM(CASE WHEN so.state = 'sale'
+                            THEN sol.price_subtotal / COALESCE(NULLIF(so.currency_rate, 0), 1)
+                            ELSE 0 END) AS revenue,
+                   SUM(CASE WHEN so.state IN ('draft', 'sent')
+                                 AND (po.order_id IS NOT NULL OR so.amount_total = 0)
+                                 AND ro.order_id IS NULL
+                            THEN sol.product_uom_qty ELSE 0 END) AS pending_attendee_seats,
+                   SUM(COALESCE(lr.registration_count, 0)) AS registration_count
+              FROM sale_order_line sol
+              JOIN sale_order so ON so.id = sol.order_id
+              JOIN res_company company ON company.id = so.company_id
+              JOIN product_product pp ON pp.id = sol.product_id
+         LEFT JOIN paid_orders po ON po.order_id = so.id
+         LEFT JOIN registered_orders ro ON ro.order_id = so.id
+         LEFT JOIN line_registrations lr ON lr.sale_order_line_id = sol.id
+             WHERE sol.event_id IS NOT NULL
+               AND so.state != 'cancel'
+          GROUP BY so.date_order::date, sol.event_id, sol.event_ticket_id, sol.product_id,
+                   pp.product_tmpl_id, so.company_id, company.currency_id
+        """)
+
+    def init(self):
+        """Create the report as a materialized view, refreshed by a scheduled action"""
+        table = SQL.identifier(self._table)
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", table))
+        self.env.cr.execute(SQL("CREATE MATERIALIZED VIEW %s AS (%s)", table, self._query()))
+        # A unique index lets the view be refreshed without blocking readers
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)", SQL.identifier(f'{self._table}_id_uniq'), table,
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX %s ON %s (event_id, date)", SQL.identifier(f'{self._table}_event_date_idx'), table,
+        ))
+
+    @api.model
+    def _cron_refresh_report(self):
+        """Scheduled action recomputing the materialized view"""
+        self.env.cr.execute(SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY %s", SQL.identifier(self._table)))
+        self.invalidate_model()
+        return True
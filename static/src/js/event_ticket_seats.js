@@ -0,0 +1,39 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+/**
+ * Refresh the seat counts of event tickets displayed on cached shop pages.
+ *
+ * Every element flagged with `data-event-ticket-seats="<ticket_id>"` is updated
+ * from a single request to the live seat status endpoint.
+ */
+publicWidget.registry.EventTicketSeats = publicWidget.Widget.extend({
+    selector: "#wrapwrap",
+
+    /**
+     * @override
+     */
+    async start() {
+        await this._super(...arguments);
+        const seatEls = this.el.querySelectorAll("[data-event-ticket-seats]");
+        if (!seatEls.length) {
+            return;
+        }
+        const ticketIds = [...new Set([...seatEls].map((el) => el.dataset.eventTicketSeats))];
+        const response = await fetch(`/shop/event_ticket/seats?ticket_ids=${ticketIds.join(",")}`);
+        if (!response.ok) {
+            return;
+        }
+        const { tickets } = await response.json();
+        const seatsByTicket = Object.fromEntries(tickets.map((ticket) => [ticket.id, ticket]));
+        for (const el of seatEls) {
+            const ticket = seatsByTicket[el.dataset.eventTicketSeats];
+            if (ticket && ticket.seats_limited) {
+                el.textContent = ticket.seats_available;
+            }
+        }
+    },
+});
+
+export default publicWidget.registry.EventTicketSeats;
@@ -0,0 +1,72 @@
+/** @odoo-module **/
+
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+/**
+ * Disable the sold out ticket combinations of the product page variant picker.
+ *
+ * The availability of every ticket variant is rendered with the page in the
+ * `.o_event_ticket_availability` element, so no request is needed when the
+ * customer changes the selected attributes.
+ */
+publicWidget.registry.EventTicketVariants = publicWidget.Widget.extend({
+    selector: "#product_detail",
+    events: {
+        "change .js_variant_change": "_onChangeVariant",
+    },
+
+    /**
+     * @override
+     */
+    async start() {
+        await this._super(...arguments);
+        const availabilityEl = this.el.querySelector(".o_event_ticket_availability");
+        this.variants = availabilityEl ? JSON.parse(availabilityEl.dataset.availability) : [];
+        this._disableSoldOutCombinations();
+    },
+
+    /**
+     * Return the attribute value ids currently selected, by attribute input name
+     */
+    _getSelectedValues() {
+        const selected = {};
+        for (const input of this.el.querySelectorAll("input.js_variant_change:checked, select.js_variant_change")) {
+            selected[input.name] = parseInt(input.value);
+        }
+        return selected;
+    },
+
+    /**
+     * Whether the variant matching the combination is sold out.
+     * Combinations without a ticket variant are left to website_sale.
+     */
+    _isSoldOut(valueIds) {
+        const variant = this.variants.find((variant) =>
+            variant.combination.every((valueId) => valueIds.includes(valueId))
+        );
+        return Boolean(variant && !variant.is_available);
+    },
+
+    _disableSoldOutCombinations() {
+        if (!this.variants.length) {
+            return;
+        }
+        const selected = this._getSelectedValues();
+        const choices = this.el.querySelectorAll("input.js_variant_change, select.js_variant_change option");
+        for (const choice of choices) {
+            const name = choice.name || choice.closest("select").name;
+            const valueIds = Object.entries(selected).map(([inputName, valueId]) =>
+                inputName === name ? parseInt(choice.value) : valueId
+            );
+            const soldOut = this._isSoldOut(valueIds);
+            choice.disabled = soldOut && !(choice.checked || choice.selected);
+            choice.closest("li, label")?.classList.toggle("css_not_available", soldOut);
+        }
+    },
+
+    _onChangeVariant() {
+        this._disableSoldOutCombinations();
+    },
+});
+
+export default publicWidget.registry.EventTicketVariants;
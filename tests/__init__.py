@@ -1,4 +1,4 @@
 # -*- coding: utf-8 -*-
 
 from . import test_event_ticket_store
-
+from . import test_performance
@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import inspect
+import json
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from werkzeug.exceptions import BadRequest
+
+from odoo import fields
+from odoo.tools import config
 from odoo.tests.common import TransactionCase, tagged
-from odoo.exceptions import ValidationError, UserError
+from odoo.exceptions import AccessError, ValidationError, UserError
+from odoo.addons.website.tools import MockRequest
+from odoo.addons.website_event_ticket_store.controllers.main import EventTicketStorePortal, WebsiteEventTicketStore
+from odoo.addons.website_event_ticket_store.tools import access_tokens, metrics, profiling
+from odoo.addons.website_event_ticket_store.tools.streaming_export import xlsx_sheet_name
 
 
 @tagged('website_event_ticket_store', 'post_install', '-at_install')
@@ -56,6 +70,452 @@ class TestEventTicketStore(TransactionCase):
         self.assertEqual(event_info['ticket_name'], self.event_ticket.name)
         self.assertEqual(event_info['ticket_price'], self.event_ticket.price)
 
+    def test_event_ticket_snapshot_memoized(self):
+        """Test that ticket snapshots are shared and refreshed on ticket writes"""
+        # The fixture event has ended, its ticket is only on sale once it is moved to the future
+        self.event.date_end = '2099-12-31 18:00:00'
+        snapshot = self.product._get_event_snapshot()
+        self.assertEqual(snapshot.ticket_name, self.event_ticket.name)
+        self.assertEqual(snapshot.event_name, self.event.name)
+        self.assertTrue(snapshot.is_available)
+
+        # Same request, same snapshot object for every consumer
+        self.assertIs(self.event_ticket._get_store_snapshot(), snapshot)
+        self.assertEqual(self.product._get_event_info(), snapshot.as_event_info())
+
+        # Writing on the ticket invalidates the memoized snapshot
+        self.event_ticket.write({'name': 'Gold Ticket'})
+        self.assertEqual(self.product._get_event_snapshot().ticket_name, 'Gold Ticket')
+
+    def test_event_ticket_seat_status(self):
+        """Test the live seat status payload served to the website"""
+        self.event.date_end = '2099-12-31 18:00:00'
+        self.event_ticket.seats_max = 5
+        status = self.event_ticket._get_store_seat_status()
+        self.assertEqual(status, [{
+            'id': self.event_ticket.id,
+            'seats_limited': True,
+            'seats_available': 5,
+            'is_available': True,
+        }])
+
+    def test_event_catalog_entries(self):
+        """Test the serialization of event products for the catalog API"""
+        self.event.date_end = '2099-12-31 18:00:00'
+        template = self.product.product_tmpl_id
+        template.event_id = self.event
+        entries = template._get_event_catalog_entries()
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['event']['id'], self.event.id)
+        self.assertTrue(entries[0]['is_available'])
+        self.assertEqual([variant['id'] for variant in entries[0]['variants']], [self.product.id])
+        self.assertEqual(entries[0]['variants'][0]['ticket']['id'], self.event_ticket.id)
+
+        # The route streams the same entries, serialized batch by batch
+        chunks = WebsiteEventTicketStore()._iter_event_catalog_chunks(self.env, template.ids, '{"products": [')
+        self.assertEqual(json.loads(''.join(chunks))['products'], json.loads(json.dumps(entries)))
+
+    def test_event_catalog_cursor(self):
+        """Test that the catalog cursor rejects malformed values and reports removed products"""
+        template = self.product.product_tmpl_id
+        template.write({'event_id': self.event.id, 'website_published': True})
+        since = template.write_date - timedelta(seconds=1)
+        controller = WebsiteEventTicketStore()
+        with MockRequest(self.env, website=self.env['website'].get_current_website()):
+            with self.assertRaises(BadRequest):
+                inspect.unwrap(WebsiteEventTicketStore.event_catalog)(controller, since='yesterday')
+            self.assertFalse(controller._get_event_catalog_removed(since))
+            template.website_published = False
+            self.assertEqual(controller._get_event_catalog_removed(since), template)
+            template.write({'website_published': True, 'active': False})
+            self.assertEqual(controller._get_event_catalog_removed(since), template)
+
+    def test_event_catalog_cursor_availability(self):
+        """Test that the catalog cursor returns products whose sale opened without a write"""
+        template = self.product.product_tmpl_id
+        template.write({'event_id': self.event.id, 'website_published': True})
+        self.event.date_end = '2099-12-31 18:00:00'
+        since = self.event_ticket.write_date
+        self.event_ticket.start_sale_datetime = since + timedelta(minutes=30)
+        controller = WebsiteEventTicketStore()
+        Template = self.env['product.template']
+        with MockRequest(self.env, website=self.env['website'].get_current_website()):
+            self.assertFalse(Template.search(controller._get_event_catalog_domain(since)))
+            with patch.object(fields.Datetime, 'now', return_value=since + timedelta(hours=1)):
+                domain = controller._get_event_catalog_domain(since)
+                self.assertEqual(Template.search(domain), template)
+                next_since, __ = controller._get_event_catalog_version(domain, fields.Datetime.to_string(since))
+                self.assertEqual(next_since, fields.Datetime.to_string(self.event_ticket.start_sale_datetime))
+                self.assertFalse(Template.search(controller._get_event_catalog_domain(fields.Datetime.to_datetime(next_since))))
+
+    def test_xlsx_sheet_name(self):
+        """Test that event names are turned into worksheet names Excel accepts"""
+        self.assertEqual(xlsx_sheet_name('Summit 2026/27'), 'Summit 2026-27')
+        self.assertEqual(xlsx_sheet_name('Q&A: Day 1 [AM]?'), 'Q&A- Day 1 -AM--')
+        self.assertEqual(len(xlsx_sheet_name('An Event Name Much Longer Than Excel Allows')), 31)
+        self.assertEqual(xlsx_sheet_name("'*'"), '-')
+        self.assertEqual(xlsx_sheet_name(''), 'Sheet1')
+
+    def test_store_registration_export_rows(self):
+        """Test that the registration export pivots answers and reads in batches"""
+        self.event.write({'question_ids': [(0, 0, {
+            'title': 'Dietary Requirements',
+            'question_type': 'text_box',
+        })]})
+        question = self.event.question_ids.filtered(lambda q: q.title == 'Dietary Requirements')
+        line = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 3,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        registrations = self.env['event.registration'].create([{
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+            'sale_order_id': self.sale_order.id,
+            'sale_order_line_id': line.id,
+            'name': f'Attendee {index}',
+            'email': f'attendee{index}@example.com',
+        } for index in range(3)])
+        self.env['event.registration.answer'].create({
+            'registration_id': registrations[1].id,
+            'question_id': question.id,
+            'value_text_box': 'Vegetarian',
+        })
+
+        header, *rows = self.event._iter_store_registration_rows(batch_size=2)
+
+        self.assertEqual(header[-1], 'Dietary Requirements')
+        self.assertEqual([row[0] for row in rows], registrations.ids)
+        self.assertEqual(rows[1][1], 'Attendee 1')
+        self.assertEqual(rows[1][-1], 'Vegetarian')
+        self.assertEqual(rows[0][-1], '')
+        self.assertEqual(rows[0][8], self.sale_order.name)
+
+    def test_portal_registration_exports(self):
+        """Test the portal CSV rows, iCalendar feed and export version"""
+        line = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 2,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        self.env['event.registration'].create([{
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+            'sale_order_id': self.sale_order.id,
+            'sale_order_line_id': line.id,
+            'name': f'Attendee {index}',
+        } for index in range(2)])
+        Registration = self.env['event.registration']
+        domain = [('sale_order_id.partner_id', '=', self.sale_order.partner_id.id)]
+
+        header, *rows = Registration._iter_portal_export_rows(domain, batch_size=1)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0][3], self.event.name)
+
+        lines = list(Registration._iter_portal_ics_lines(domain))
+        self.assertEqual(lines.count('BEGIN:VEVENT'), 1)
+        self.assertIn('SUMMARY:Test Event', lines)
+        self.assertEqual(lines[-1], 'END:VCALENDAR')
+
+        __, etag = Registration._get_portal_export_version(domain)
+        self.event.write({'name': 'Renamed Event'})
+        self.assertNotEqual(Registration._get_portal_export_version(domain)[1], etag)
+
+    def test_registrations_feed_token(self):
+        """Test that the calendar feed is served at a signed per-partner URL without a session"""
+        partner = self.sale_order.partner_id
+        token = access_tokens.sign_registrations_feed_token(self.env, partner.id)
+        self.assertTrue(access_tokens.check_registrations_feed_token(self.env, partner.id, token))
+        self.assertFalse(access_tokens.check_registrations_feed_token(self.env, partner.id + 1, token))
+        # Feed tokens cannot be replayed as attendee tokens
+        self.assertFalse(access_tokens.check_attendee_token(self.env, partner.id, token))
+
+        feed = inspect.unwrap(EventTicketStorePortal.portal_registrations_feed)
+        public_env = self.env(user=self.env.ref('base.public_user'))
+        with patch.object(EventTicketStorePortal, '_make_registrations_export_response', return_value='feed') as make_response, \
+                MockRequest(public_env, website=self.env['website'].get_current_website()):
+            feed(EventTicketStorePortal(), partner_id=partner.id + 1, token=token)
+            make_response.assert_not_called()
+            self.assertEqual(feed(EventTicketStorePortal(), partner_id=partner.id, token=token), 'feed')
+        make_response.assert_called_once_with('ics', [('sale_order_id.partner_id', '=', partner.id)])
+
+    def test_ticket_sales_report(self):
+        """Test that the refreshed sales report aggregates sold quantities and registrations"""
+        line = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 2,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        self.env['event.registration'].create([{
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+            'sale_order_id': self.sale_order.id,
+            'sale_order_line_id': line.id,
+            'name': f'Attendee {index}',
+        } for index in range(2)])
+        self.sale_order.action_confirm()
+        self.env.flush_all()
+
+        Report = self.env['event.ticket.store.sale.report']
+        Report._cron_refresh_report()
+        report_line = Report.search([('event_ticket_id', '=', self.event_ticket.id)])
+
+        self.assertEqual(len(report_line), 1)
+        self.assertEqual(report_line.sold_qty, 2)
+        self.assertEqual(report_line.registration_count, 2)
+        self.assertEqual(report_line.pending_attendee_seats, 0)
+        self.assertEqual(report_line.product_tmpl_id, self.product.product_tmpl_id)
+
+    def test_ticket_sales_report_free_pending_seats(self):
+        """Test that free orders held for attendee details count as pending seats"""
+        self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 3,
+            'price_unit': 0.0,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        self.assertTrue(self.sale_order.attendee_details_pending)
+        self.env.flush_all()
+
+        Report = self.env['event.ticket.store.sale.report']
+        Report._cron_refresh_report()
+        report_line = Report.search([('event_ticket_id', '=', self.event_ticket.id)])
+        self.assertEqual(report_line.pending_attendee_seats, 3)
+
+    def test_box_office_order(self):
+        """Test that box office sales are paid, registered and checked for seats at once"""
+        journal = self.env['account.journal'].search([
+            ('type', '=', 'cash'), ('company_id', '=', self.env.company.id),
+        ], limit=1)
+        if not journal:
+            self.skipTest("No cash journal: the company has no chart of accounts")
+        self.event.date_end = '2099-12-31 18:00:00'
+        self.event_ticket.seats_max = 3
+        self.product.barcode = 'TICKET-VIP'
+        partner = self.env.ref('base.res_partner_1')
+
+        box_office = self.env['event.ticket.store.box.office'].create({
+            'partner_id': partner.id,
+            'journal_id': journal.id,
+            'line_ids': [(0, 0, {'product_id': self.product.id, 'attendee_name': name}) for name in ('Ann', 'Bob')],
+        })
+        order = self.env['sale.order'].browse(box_office.action_sell()['res_id'])
+
+        self.assertEqual(order.state, 'sale')
+        self.assertEqual(order.order_line.product_uom_qty, 2)
+        self.assertEqual(sorted(order.order_line.registration_ids.mapped('name')), ['Ann', 'Bob'])
+        self.assertIn(order.invoice_ids.payment_state, ('paid', 'in_payment'))
+
+        # Only one seat left: the whole sale is refused and nothing is kept
+        orders_count = self.env['sale.order'].search_count([('partner_id', '=', partner.id)])
+        with self.assertRaises(UserError):
+            self.env['sale.order']._create_box_office_order(
+                partner, [(self.product, [{'name': 'Cid'}, {'name': 'Dan'}])], journal,
+            )
+        self.assertEqual(self.env['sale.order'].search_count([('partner_id', '=', partner.id)]), orders_count)
+
+    def test_provision_store_products(self):
+        """Test that provisioning creates one variant per ticket and is idempotent"""
+        event = self.env['event.event'].create({
+            'name': 'Provisioned Event',
+            'date_begin': '2099-12-31 10:00:00',
+            'date_end': '2099-12-31 18:00:00',
+            'event_ticket_ids': [(5, 0, 0),
+                (0, 0, {'name': 'Standard', 'price': 40.0}),
+                (0, 0, {'name': 'VIP', 'price': 100.0}),
+            ],
+        })
+        wizard = self.env['event.ticket.store.provisioning'].with_context(active_ids=[event.id]).create({})
+        wizard.action_provision()
+
+        template = event.store_product_template_id
+        self.assertTrue(event.redirect_to_store)
+        self.assertEqual(template.event_id, event)
+        self.assertEqual(template.list_price, 40.0)
+        self.assertEqual(template.product_variant_ids.event_ticket_id, event.event_ticket_ids)
+        for variant in template.product_variant_ids:
+            self.assertEqual(variant.lst_price, variant.event_ticket_id.price)
+
+        # A new ticket only adds its variant, and price changes reach the variants
+        event.event_ticket_ids = [(0, 0, {'name': 'Student', 'price': 25.0})]
+        event.event_ticket_ids.filtered(lambda ticket: ticket.name == 'VIP').price = 120.0
+        self.assertEqual(event._provision_store_products(), template)
+        self.assertEqual(len(template.product_variant_ids), 3)
+        self.assertEqual(template.product_variant_ids.event_ticket_id, event.event_ticket_ids)
+        self.assertEqual(template.list_price, 25.0)
+        for variant in template.product_variant_ids:
+            self.assertEqual(variant.lst_price, variant.event_ticket_id.price)
+
+    def test_event_availability_matrix(self):
+        """Test that every ticket variant of a template gets its own availability"""
+        event = self.env['event.event'].create({
+            'name': 'Matrix Event',
+            'date_begin': '2099-12-31 10:00:00',
+            'date_end': '2099-12-31 18:00:00',
+            'event_ticket_ids': [(5, 0, 0),
+                (0, 0, {'name': 'Early Bird', 'price': 30.0, 'end_sale_datetime': '2020-01-01 00:00:00'}),
+                (0, 0, {'name': 'Standard', 'price': 50.0, 'seats_max': 20}),
+            ],
+        })
+        template = event._provision_store_products()
+        early_bird, standard = event.event_ticket_ids.sorted('price')
+
+        entries = {entry['ticket_id']: entry for entry in template._get_event_availability_matrix()[template.id]}
+        self.assertEqual(set(entries), {early_bird.id, standard.id})
+        self.assertFalse(entries[early_bird.id]['is_available'])
+        self.assertTrue(entries[standard.id]['is_available'])
+        self.assertEqual(entries[standard.id]['seats_available'], 20)
+        self.assertEqual(entries[standard.id]['price'], 50.0)
+        standard_variant = template.product_variant_ids.filtered(lambda variant: variant.event_ticket_id == standard)
+        self.assertEqual(entries[standard.id]['product_id'], standard_variant.id)
+        self.assertEqual(entries[standard.id]['combination'], standard_variant.product_template_attribute_value_ids.ids)
+
+        # The template stays on sale while one of its tickets is
+        self.assertTrue(template._is_event_ticket_available())
+        standard.end_sale_datetime = '2020-01-01 00:00:00'
+        self.assertFalse(template._is_event_ticket_available())
+
+    def test_event_facet_domain(self):
+        """Test the shop event facets as SQL domains"""
+        Template = self.env['product.template']
+        event = self.env['event.event'].create({
+            'name': 'Facet Event',
+            'date_begin': '2099-06-15 10:00:00',
+            'date_end': '2099-06-15 18:00:00',
+            'event_ticket_ids': [(5, 0, 0), (0, 0, {'name': 'Standard', 'price': 10.0, 'seats_max': 1})],
+        })
+        template = event._provision_store_products()
+        self.assertEqual(template.event_date_begin, event.date_begin)
+
+        def search(**facets):
+            return Template.search([('id', 'in', (template | self.product.product_tmpl_id).ids)]
+                                   + Template._get_event_facet_domain(**facets))
+
+        self.assertEqual(search(event_date='upcoming'), template)
+        self.assertFalse(search(event_date='today'))
+        # At 20:00 UTC the event (10:00 UTC) is today in UTC and Los Angeles, but yesterday in Auckland
+        with patch.object(fields.Datetime, 'now', return_value=datetime(2099, 6, 15, 20, 0)):
+            self.assertEqual(search(event_date='today'), template)
+            Template = Template.with_context(tz='America/Los_Angeles')
+            self.assertEqual(search(event_date='today'), template)
+            Template = Template.with_context(tz='Pacific/Auckland')
+            self.assertFalse(search(event_date='today'))
+            self.assertEqual(search(event_date='week'), template)
+        Template = self.env['product.template']
+        self.assertEqual(search(event_id=self.event.id), self.product.product_tmpl_id)
+        # The fixture event has ended, the facet event is on sale until its only seat is taken
+        self.assertEqual(search(event_available=True), template)
+        self.env['event.registration'].create({
+            'event_id': event.id,
+            'event_ticket_id': event.event_ticket_ids.id,
+            'name': 'Ann',
+            'state': 'open',
+        })
+        self.assertFalse(search(event_available=True))
+
+    def test_store_redirects(self):
+        """Test the batched store redirect resolution of events"""
+        event = self.env['event.event'].create({
+            'name': 'Redirect Event',
+            'date_begin': '2099-12-31 10:00:00',
+            'date_end': '2099-12-31 18:00:00',
+            'event_ticket_ids': [(5, 0, 0), (0, 0, {'name': 'Standard', 'price': 10.0})],
+        })
+        template = event._provision_store_products()
+        event.redirect_to_store = True
+        self.event.redirect_to_store = True
+
+        redirects = (event | self.event)._get_store_redirects()
+        self.assertEqual(redirects[event.id], {'url': template.website_url, 'is_available': True})
+        self.assertEqual(redirects[self.event.id]['url'], '/shop')
+        self.assertEqual(event.get_store_redirect_url(), template.website_url)
+
+        # Every ticket of the store product sold out: no "Buy Tickets" button
+        event.event_ticket_ids.end_sale_datetime = '2020-01-01 00:00:00'
+        self.assertFalse(event._get_store_redirects()[event.id]['is_available'])
+
+    def test_store_redirects_listing(self):
+        """Test that the /event listing cards render the redirects resolved by the controller"""
+        self.event.write({'redirect_to_store': True, 'date_end': '2099-12-31 18:00:00'})
+        store_redirects = {self.event.id: {'url': '/shop/listing-store-redirect', 'is_available': True}}
+        Event = type(self.env['event.event'])
+        # Cards must not resolve their event one by one
+        with patch.object(Event, '_get_store_redirects', side_effect=AssertionError), \
+                MockRequest(self.env, website=self.env['website'].get_current_website()):
+            html = str(self.env['ir.qweb']._render('website_event.events_list', {
+                'event_ids': self.event,
+                'store_redirects': store_redirects,
+            }))
+            self.assertIn('/shop/listing-store-redirect', html)
+            store_redirects[self.event.id]['is_available'] = False
+            html = str(self.env['ir.qweb']._render('website_event.events_list', {
+                'event_ids': self.event,
+                'store_redirects': store_redirects,
+            }))
+        self.assertNotIn('/shop/listing-store-redirect', html)
+        self.assertIn('Sold Out', html)
+
+    def test_presale_cache_warmup(self):
+        """Test that store pages are warmed once before a sale opens"""
+        now = fields.Datetime.now()
+        event = self.env['event.event'].create({
+            'name': 'Warm Event',
+            'date_begin': '2099-12-31 10:00:00',
+            'date_end': '2099-12-31 18:00:00',
+            'event_ticket_ids': [(5, 0, 0),
+                (0, 0, {'name': 'Soon', 'price': 10.0, 'start_sale_datetime': now + timedelta(minutes=2)}),
+                (0, 0, {'name': 'Later', 'price': 20.0, 'start_sale_datetime': now + timedelta(days=3)}),
+            ],
+        })
+        template = event._provision_store_products()
+        soon, later = event.event_ticket_ids.sorted('price')
+        Ticket = self.env['event.event.ticket']
+
+        with patch.object(type(Ticket), '_warm_store_urls', autospec=True) as warm:
+            Ticket._cron_warm_presale_caches()
+            Ticket._cron_warm_presale_caches()
+        self.assertEqual(warm.call_count, 1)
+        urls = warm.call_args.args[1]
+        self.assertTrue(urls[0].endswith(template.website_url))
+        token = warm.call_args.kwargs['headers'][Ticket.STORE_WARMUP_HEADER]
+        self.assertEqual(access_tokens.check_warmup_token(self.env, token), soon.start_sale_datetime.replace(microsecond=0))
+        self.assertEqual(soon.store_warmed_sale_datetime, soon.start_sale_datetime)
+        self.assertFalse(later.store_warmed_sale_datetime)
+
+    def test_presale_warmup_keeps_fragment_cache_key(self):
+        """Test that fragments warmed before a sale opens are looked up once it is open"""
+        sale_start = fields.Datetime.now().replace(microsecond=0) + timedelta(minutes=2)
+        self.event.date_end = '2099-12-31 18:00:00'
+        self.event_ticket.start_sale_datetime = sale_start
+        self.event_ticket._invalidate_store_snapshots()
+        closed_key = self.event_ticket._get_store_fragment_cache_key()
+
+        # Warm-up requests render as of the sale start carried by their signed header
+        token = access_tokens.sign_warmup_token(self.env, sale_start)
+        self.assertIsNone(access_tokens.check_warmup_token(self.env, token + '0'))
+        warmup_now = fields.Datetime.to_string(access_tokens.check_warmup_token(self.env, token))
+        warmed_key = self.event_ticket.with_context(event_ticket_store_now=warmup_now)._get_store_fragment_cache_key()
+        self.assertNotEqual(warmed_key, closed_key)
+
+        write_date = self.event_ticket.write_date
+        self.event_ticket._mark_store_warmed()
+        self.event_ticket._invalidate_store_snapshots()
+        self.assertEqual(self.event_ticket.store_warmed_sale_datetime, self.event_ticket.start_sale_datetime)
+        self.assertEqual(self.event_ticket.write_date, write_date)
+
+        # Once the sale is open, regular requests compute the warmed key
+        with patch.object(fields.Datetime, 'now', return_value=sale_start + timedelta(seconds=30)):
+            self.assertEqual(self.event_ticket._get_store_fragment_cache_key(), warmed_key)
+
     def test_product_event_availability(self):
         """Test checking if event ticket is available"""
         # Test available ticket
@@ -83,6 +543,22 @@ class TestEventTicketStore(TransactionCase):
         self.assertEqual(line.event_id, self.event)
         self.assertEqual(line.event_ticket_id, self.event_ticket)
 
+    def test_event_line_constraint_batch(self):
+        """Test that one line missing its ticket fails the whole batch"""
+        line_vals = {
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        }
+        with self.assertRaises(ValidationError):
+            self.env['sale.order.line'].create([line_vals, dict(line_vals, event_ticket_id=False)])
+
+        lines = self.env['sale.order.line'].create([line_vals, line_vals])
+        with self.assertRaises(ValidationError):
+            lines.write({'event_ticket_id': False})
+
     def test_sale_order_line_onchange_method(self):
         """Test that sale order line onchange method works correctly"""
         # Create sale order line without event fields
@@ -143,6 +619,76 @@ class TestEventTicketStore(TransactionCase):
                 add_qty=1
             )
 
+    def test_cart_update_rejection_metrics(self):
+        """Test that refused cart additions are counted by reason"""
+        self.event_ticket.sale_available = False
+        rejections = metrics.CART_REJECTIONS._values.get((('reason', 'unavailable'),), 0)
+
+        with self.assertRaises(UserError):
+            self.sale_order._cart_update(product_id=self.product.id, add_qty=1)
+
+        self.assertEqual(metrics.CART_REJECTIONS._values[(('reason', 'unavailable'),)], rejections + 1)
+        self.assertIn(
+            f'event_ticket_store_cart_rejections_total{{reason="unavailable",worker="{os.getpid()}"}}',
+            metrics.render_metrics(),
+        )
+
+    def test_metrics_scrape_token(self):
+        """Test that metrics are only served to scrapers presenting the configured token"""
+        with patch.dict(config.options, {metrics.METRICS_TOKEN_OPTION: ''}):
+            self.assertFalse(metrics.is_scrape_authorized('Bearer '))
+        with patch.dict(config.options, {metrics.METRICS_TOKEN_OPTION: 's3cret'}):
+            self.assertTrue(metrics.is_scrape_authorized('Bearer s3cret'))
+            self.assertFalse(metrics.is_scrape_authorized('Bearer wrong'))
+            self.assertFalse(metrics.is_scrape_authorized(None))
+
+    def test_attendee_access_token(self):
+        """Test that order tokens are signed on demand, and checked without reading the order"""
+        token = self.sale_order._generate_attendee_access_token()
+        self.assertEqual(token, access_tokens.sign_attendee_token(self.env, self.sale_order.id))
+        # Nothing is written, at creation or when the token is read
+        self.assertFalse(self.sale_order.attendee_access_token)
+        self.assertTrue(self.sale_order.get_attendee_details_url().endswith(
+            f'/my/orders/{self.sale_order.id}/attendee-details/{token}'
+        ))
+
+        self.assertTrue(access_tokens.check_attendee_token(self.env, self.sale_order.id, token))
+        self.assertFalse(access_tokens.check_attendee_token(self.env, self.sale_order.id + 1, token))
+        self.assertFalse(access_tokens.check_attendee_token(self.env, self.sale_order.id, 'garbage'))
+
+        self.assertFalse(access_tokens.is_legacy_token(token))
+        self.assertTrue(access_tokens.is_legacy_token('0b7c4a0e-6f1a-4c3e-9d2b-5a8f0e1c2d3b'))
+
+    def test_attendee_access_rate_limit(self):
+        """Test that a client address is refused after too many failed attempts"""
+        address = '192.0.2.39'
+        for __ in range(access_tokens.MAX_FAILURES - 1):
+            access_tokens.register_failure(address)
+        self.assertFalse(access_tokens.is_rate_limited(address))
+
+        access_tokens.register_failure(address)
+        self.assertTrue(access_tokens.is_rate_limited(address))
+        self.assertFalse(access_tokens.is_rate_limited('192.0.2.40'))
+        access_tokens._failures.pop(address)
+
+    def test_profiling_token(self):
+        """Test that profiling headers are signed, expire and are admin-only"""
+        token = profiling.issue_profiling_token(self.env)
+        self.assertTrue(profiling._check_profiling_token(self.env, token))
+
+        expiry, signature = token.split('.')
+        self.assertFalse(profiling._check_profiling_token(self.env, f'{int(expiry) + 1}.{signature}'))
+        self.assertFalse(profiling._check_profiling_token(self.env, profiling.issue_profiling_token(self.env, lifetime=-1)))
+        self.assertFalse(profiling._check_profiling_token(self.env, 'garbage'))
+
+        portal_user = self.env['res.users'].create({
+            'name': 'Portal Profiler',
+            'login': 'portal_profiler',
+            'groups_id': [(6, 0, [self.env.ref('base.group_portal').id])],
+        })
+        with self.assertRaises(AccessError):
+            profiling.issue_profiling_token(self.env(user=portal_user))
+
     def test_product_onchange_methods(self):
         """Test product onchange methods"""
         # Test service_tracking onchange on template
@@ -537,6 +1083,35 @@ class TestEventTicketStore(TransactionCase):
         line._compute_price_unit()
         self.assertEqual(line.price_unit, 80.0)  # Should use product price
 
+    def test_event_line_price_memo(self):
+        """Test that event lines share pricelist evaluations until prices change"""
+        lines = self.env['sale.order.line'].create([{
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        } for __ in range(3)])
+        SaleOrderLine = type(self.env['sale.order.line'])
+        self.env['sale.order.line']._invalidate_event_price_memo()
+
+        with patch.object(SaleOrderLine, '_get_pricelist_price', autospec=True, return_value=100.0) as pricelist_price:
+            self.assertEqual([line._get_display_price() for line in lines], [100.0] * 3)
+            self.assertEqual(pricelist_price.call_count, 1)
+
+            # A price change drops the memo
+            self.product.product_tmpl_id.list_price = 90.0
+            lines[0]._get_display_price()
+            self.assertEqual(pricelist_price.call_count, 2)
+
+            # So do pricelist creations and deletions
+            pricelist = self.env['product.pricelist'].create({'name': 'Event Memo Pricelist'})
+            lines[0]._get_display_price()
+            self.assertEqual(pricelist_price.call_count, 3)
+            pricelist.unlink()
+            lines[0]._get_display_price()
+            self.assertEqual(pricelist_price.call_count, 4)
+
     def test_pricing_with_product_discounts(self):
         """Test that product discounts are applied correctly"""
         # Create event
@@ -738,6 +1313,206 @@ class TestEventTicketStore(TransactionCase):
         sale_order.action_confirm()
         self.assertEqual(sale_order.state, 'sale')
 
+    def test_event_checkout_errors(self):
+        """Test that checkout revalidates availability and seats of every event line"""
+        self.event.date_end = '2099-12-31 18:00:00'
+        line = self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 3,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        self.event_ticket.seats_max = 5
+        self.assertEqual(self.sale_order._get_event_checkout_errors(), {})
+
+        self.event_ticket.seats_max = 2
+        errors = self.sale_order._get_event_checkout_errors()
+        self.assertIn('Only 2 seat(s) left', errors[line])
+
+        self.event_ticket.end_sale_datetime = '2020-01-01 00:00:00'
+        errors = self.sale_order._get_event_checkout_errors()
+        self.assertIn('no longer available', errors[line])
+
+    def test_payment_validate_after_sell_out(self):
+        """Test that a paid order reaches the attendee step even if its tickets sold out since"""
+        self.event.date_end = '2099-12-31 18:00:00'
+        self.env['sale.order.line'].create({
+            'order_id': self.sale_order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 2,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        provider = self.env['payment.provider'].create({
+            'name': 'Test Provider',
+            'code': 'none',
+            'state': 'test',
+        })
+        self.env['payment.transaction'].create({
+            'provider_id': provider.id,
+            'payment_method_id': self.env.ref('payment.payment_method_unknown').id,
+            'reference': f'TEST-SOLD-OUT-{self.sale_order.id}',
+            'amount': self.sale_order.amount_total,
+            'currency_id': self.sale_order.currency_id.id,
+            'partner_id': self.sale_order.partner_id.id,
+            'sale_order_ids': [(6, 0, self.sale_order.ids)],
+            'state': 'done',
+        })
+        # The last seat went to someone else while the buyer was on the payment page
+        self.event_ticket.seats_max = 1
+        self.assertTrue(self.sale_order._get_event_checkout_errors())
+
+        # Call the route body, without the routing and profiling decorators
+        shop_payment_validate = inspect.unwrap(WebsiteEventTicketStore.shop_payment_validate)
+        with MockRequest(self.env, website=self.env['website'].get_current_website()) as request:
+            request.session['sale_last_order_id'] = self.sale_order.id
+            response = shop_payment_validate(WebsiteEventTicketStore(), sale_order_id=self.sale_order.id)
+        self.assertIn(self.sale_order.get_attendee_details_url(), response.location)
+
+    def test_batched_payment_confirmation(self):
+        """Test that a batch of paid transactions only confirms orders ready for it"""
+        regular_product = self.env['product.product'].create({
+            'name': 'Regular Product',
+            'type': 'service',
+            'list_price': 50.0,
+        })
+        partner = self.env.ref('base.res_partner_1')
+        pending_order, registered_order, regular_order = self.env['sale.order'].create([
+            {'partner_id': partner.id} for __ in range(3)
+        ])
+        for order in pending_order | registered_order:
+            self.env['sale.order.line'].create({
+                'order_id': order.id,
+                'product_id': self.product.id,
+                'product_uom_qty': 1,
+                'event_id': self.event.id,
+                'event_ticket_id': self.event_ticket.id,
+            })
+        self.env['sale.order.line'].create({
+            'order_id': regular_order.id,
+            'product_id': regular_product.id,
+            'product_uom_qty': 1,
+        })
+        self.env['event.registration'].create({
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+            'sale_order_id': registered_order.id,
+            'sale_order_line_id': registered_order.order_line.id,
+            'name': 'Test Attendee',
+            'email': 'test@example.com',
+        })
+
+        orders = pending_order | registered_order | regular_order
+        self.assertEqual(orders._filter_awaiting_attendee_details(), pending_order)
+
+        provider = self.env['payment.provider'].create({
+            'name': 'Test Provider',
+            'code': 'none',
+            'state': 'test',
+        })
+        transactions = self.env['payment.transaction'].create([{
+            'provider_id': provider.id,
+            'payment_method_id': self.env.ref('payment.payment_method_unknown').id,
+            'reference': f'TEST-BATCH-{order.id}',
+            'amount': order.amount_total,
+            'currency_id': order.currency_id.id,
+            'partner_id': partner.id,
+            'sale_order_ids': [(6, 0, order.ids)],
+            'state': 'done',
+        } for order in orders])
+
+        confirmed_orders = transactions._check_amount_and_confirm_order()
+
+        self.assertEqual(confirmed_orders, registered_order | regular_order)
+        self.assertEqual(pending_order.state, 'draft')
+        self.assertEqual(registered_order.state, 'sale')
+        self.assertEqual(regular_order.state, 'sale')
+
+    def test_reap_abandoned_event_carts(self):
+        """Test that the reaper cancels unpaid event carts and keeps paid ones"""
+        website = self.env['website'].get_current_website()
+        self.event.write({'date_begin': '2020-01-01 10:00:00', 'date_end': '2020-01-01 18:00:00'})
+        ended_cart, paid_cart = self.env['sale.order'].create([{
+            'partner_id': self.env.ref('base.res_partner_1').id,
+            'website_id': website.id,
+        } for __ in range(2)])
+        for cart in ended_cart | paid_cart:
+            self.env['sale.order.line'].create({
+                'order_id': cart.id,
+                'product_id': self.product.id,
+                'product_uom_qty': 1,
+                'event_id': self.event.id,
+                'event_ticket_id': self.event_ticket.id,
+            })
+        self.env['payment.transaction'].create({
+            'provider_id': self.env['payment.provider'].create({'name': 'Test Provider', 'code': 'none'}).id,
+            'payment_method_id': self.env.ref('payment.payment_method_unknown').id,
+            'reference': f'TEST-REAPER-{paid_cart.id}',
+            'amount': paid_cart.amount_total,
+            'currency_id': paid_cart.currency_id.id,
+            'partner_id': paid_cart.partner_id.id,
+            'sale_order_ids': [(6, 0, paid_cart.ids)],
+            'state': 'done',
+        })
+
+        self.env['sale.order']._cron_reap_abandoned_event_carts(batch_size=1, auto_commit=False)
+
+        self.assertEqual(ended_cart.state, 'cancel')
+        self.assertEqual(paid_cart.state, 'draft')
+
+    def test_portal_pending_orders_match_counter(self):
+        """Test that the portal counter and the pending registrations list apply the same rule"""
+        order = self.env['sale.order'].create({'partner_id': self.env.user.partner_id.id})
+        self.env['sale.order.line'].create({
+            'order_id': order.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        provider = self.env['payment.provider'].create({'name': 'Test Provider', 'code': 'none'})
+        # A paid transaction followed by a later draft one
+        self.env['payment.transaction'].create([{
+            'provider_id': provider.id,
+            'payment_method_id': self.env.ref('payment.payment_method_unknown').id,
+            'reference': f'TEST-PORTAL-{order.id}-{state}',
+            'amount': order.amount_total,
+            'currency_id': order.currency_id.id,
+            'partner_id': order.partner_id.id,
+            'sale_order_ids': [(6, 0, order.ids)],
+            'state': state,
+        } for state in ('done', 'draft')])
+
+        controller = EventTicketStorePortal()
+        with MockRequest(self.env, website=self.env['website'].get_current_website()):
+            counters = controller._prepare_home_portal_values(['pending_event_registrations_count'])
+            self.assertEqual(controller._get_portal_pending_orders(), order)
+        self.assertEqual(counters['pending_event_registrations_count'], 1)
+
+    def test_reap_keeps_free_held_orders(self):
+        """Test that free orders held for attendee details are not reaped"""
+        website = self.env['website'].get_current_website()
+        self.event.write({'date_begin': '2020-01-01 10:00:00', 'date_end': '2020-01-01 18:00:00'})
+        free_cart = self.env['sale.order'].create({
+            'partner_id': self.env.ref('base.res_partner_1').id,
+            'website_id': website.id,
+        })
+        self.env['sale.order.line'].create({
+            'order_id': free_cart.id,
+            'product_id': self.product.id,
+            'product_uom_qty': 1,
+            'price_unit': 0.0,
+            'event_id': self.event.id,
+            'event_ticket_id': self.event_ticket.id,
+        })
+        self.assertFalse(free_cart.amount_total)
+        self.assertTrue(free_cart.attendee_details_pending)
+
+        self.env['sale.order']._cron_reap_abandoned_event_carts(auto_commit=False)
+
+        self.assertEqual(free_cart.state, 'draft')
+
     def test_non_event_order_confirmation(self):
         """Test that non-event orders can be confirmed without attendee registrations"""
         # Create regular product
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import time
+
+from odoo.addons.website.tools import MockRequest
+from odoo.addons.website_event_ticket_store.controllers.main import (
+    EventTicketStorePortal,
+    WebsiteEventTicketStore,
+)
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('website_event_ticket_store_perf', 'post_install', '-at_install', '-standard')
+class TestEventTicketStorePerformance(TransactionCase):
+    """Query-count and latency benchmarks for the module's hot paths
+
+    Each operation is measured at a small and a large volume. Every hot path
+    works in batch, so the large volume may only cost a few more queries than
+    the small one, whatever the number of extra records. A query per record
+    adds LARGE_VOLUME - SMALL_VOLUME queries and fails the run.
+
+    Run with ``--test-tags website_event_ticket_store_perf``. Set the
+    ``EVENT_TICKET_STORE_BENCH_REPORT`` environment variable to a file path to
+    dump the timings as JSON, for comparison between runs.
+    """
+
+    # Extra queries allowed at the large volume, in total, by operation:
+    # prefetch batches and sequence lookups, never one per record
+    QUERY_GROWTH_TOLERANCE = {
+        'cart_update': 3,
+        'attendee_post': 5,
+        'portal_counters': 3,
+        'reminder_cron': 5,
+    }
+    TICKET_TYPES = 30
+    SMALL_VOLUME = 10
+    LARGE_VOLUME = 100
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._report = []
+
+        cls.partner = cls.env.user.partner_id
+        cls.event = cls.env['event.event'].create({
+            'name': 'Benchmark Event',
+            'date_begin': '2099-06-01 09:00:00',
+            'date_end': '2099-06-03 18:00:00',
+        })
+        cls.tickets = cls.env['event.event.ticket'].create([{
+            'name': f'Ticket {index}',
+            'event_id': cls.event.id,
+            'price': 10.0 + index,
+            'seats_max': 0 if index % 2 else 100000,
+        } for index in range(cls.TICKET_TYPES)])
+        # One variant per ticket, through the "Event Ticket" attribute
+        cls.template = cls.event._provision_store_products()
+        cls.products = cls.template.product_variant_ids.sorted(lambda variant: variant.event_ticket_id.id)
+        cls.product = cls.products[0]
+
+        cls.provider = cls.env['payment.provider'].create({
+            'name': 'Benchmark Provider',
+            'code': 'none',
+            'state': 'test',
+        })
+        cls.payment_method = cls.env.ref('payment.payment_method_unknown')
+
+    @classmethod
+    def tearDownClass(cls):
+        for entry in cls._report:
+            _logger.info(
+                "benchmark %(operation)s volume=%(volume)s queries=%(queries)s duration=%(duration).3fs",
+                entry,
+            )
+        report_path = os.environ.get('EVENT_TICKET_STORE_BENCH_REPORT')
+        if report_path:
+            with open(report_path, 'w') as report_file:
+                json.dump(cls._report, report_file, indent=2)
+        super().tearDownClass()
+
+    # ------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------
+
+    def _measure(self, operation, volume, func):
+        """Run func and record its query count and wall-clock duration"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        query_count = self.cr.sql_log_count
+        start = time.perf_counter()
+        func()
+        self.env.flush_all()
+        entry = {
+            'operation': operation,
+            'volume': volume,
+            'queries': self.cr.sql_log_count - query_count,
+            'duration': time.perf_counter() - start,
+        }
+        self._report.append(entry)
+        return entry['queries']
+
+    def _assert_query_growth(self, operation, small_queries, large_queries):
+        """Fail when queries grow with the volume beyond the operation's tolerance"""
+        growth = large_queries - small_queries
+        self.assertLessEqual(
+            growth, self.QUERY_GROWTH_TOLERANCE[operation],
+            f"{operation}: {small_queries} queries for {self.SMALL_VOLUME} records, "
+            f"{large_queries} for {self.LARGE_VOLUME} ({growth} extra)",
+        )
+
+    def _create_order(self, lines=1, quantity=1):
+        order = self.env['sale.order'].create({'partner_id': self.partner.id})
+        self.env['sale.order.line'].create([{
+            'order_id': order.id,
+            'product_id': product.id,
+            'product_uom_qty': quantity,
+            'event_id': self.event.id,
+            'event_ticket_id': product.event_ticket_id.id,
+        } for product in (self.products * (lines // len(self.products) + 1))[:lines]])
+        return order
+
+    def _create_paid_orders(self, count):
+        orders = self.env['sale.order']
+        for __ in range(count):
+            orders |= self._create_order()
+        self.env['payment.transaction'].create([{
+            'provider_id': self.provider.id,
+            'payment_method_id': self.payment_method.id,
+            'reference': f'BENCH-{order.id}',
+            'amount': order.amount_total,
+            'currency_id': order.currency_id.id,
+            'partner_id': self.partner.id,
+            'sale_order_ids': [(6, 0, order.ids)],
+            'state': 'done',
+        } for order in orders])
+        return orders
+
+    def _attendee_form_data(self, order):
+        form_data = {}
+        counter = 1
+        for line in order.order_line:
+            for __ in range(int(line.product_uom_qty)):
+                form_data.update({
+                    f'{counter}-event_ticket_id': str(line.event_ticket_id.id),
+                    f'{counter}-sale_order_line_id': str(line.id),
+                    f'{counter}-name': f'Attendee {counter}',
+                    f'{counter}-email': f'attendee{counter}@example.com',
+                })
+                counter += 1
+        return form_data
+
+    # ------------------------------------------------------------
+    # Benchmarks
+    # ------------------------------------------------------------
+
+    def test_cart_update_query_growth(self):
+        """Adding a ticket must not cost more queries on a bigger cart"""
+        queries = []
+        for volume in (self.SMALL_VOLUME, self.LARGE_VOLUME):
+            order = self._create_order(lines=volume)
+            queries.append(self._measure(
+                'cart_update', volume,
+                lambda: order._cart_update(product_id=self.product.id, add_qty=1),
+            ))
+        self._assert_query_growth('cart_update', *queries)
+
+    def test_attendee_post_query_growth(self):
+        """Registering a group order must scale with the number of attendees"""
+        controller = WebsiteEventTicketStore()
+        queries = []
+        for volume in (self.SMALL_VOLUME, self.LARGE_VOLUME):
+            order = self._create_order(quantity=volume)
+            form_data = self._attendee_form_data(order)
+            with MockRequest(self.env, website=self.env['website'].get_current_website()):
+                queries.append(self._measure(
+                    'attendee_post', volume,
+                    lambda: controller._process_event_attendee_data_from_checkout(order, form_data),
+                ))
+            self.assertEqual(len(order.order_line.registration_ids), volume)
+        self._assert_query_growth('attendee_post', *queries)
+
+    def test_portal_counters_query_growth(self):
+        """Portal counters must scale with the partner's order history"""
+        controller = EventTicketStorePortal()
+        counters = ['pending_event_registrations_count', 'event_registrations_count']
+        queries = []
+        self._create_paid_orders(self.SMALL_VOLUME)
+        for volume in (self.SMALL_VOLUME, self.LARGE_VOLUME):
+            if volume == self.LARGE_VOLUME:
+                self._create_paid_orders(self.LARGE_VOLUME - self.SMALL_VOLUME)
+            with MockRequest(self.env, website=self.env['website'].get_current_website()):
+                queries.append(self._measure(
+                    'portal_counters', volume,
+                    lambda: controller._prepare_home_portal_values(counters),
+                ))
+        self._assert_query_growth('portal_counters', *queries)
+
+    def test_reminder_cron_query_growth(self):
+        """The reminder cron must scale with the number of pending orders"""
+        queries = []
+        self._create_paid_orders(self.SMALL_VOLUME)
+        for volume in (self.SMALL_VOLUME, self.LARGE_VOLUME):
+            if volume == self.LARGE_VOLUME:
+                self._create_paid_orders(self.LARGE_VOLUME - self.SMALL_VOLUME)
+            queries.append(self._measure(
+                'reminder_cron', volume,
+                self.env['sale.order']._cron_send_pending_attendee_reminders,
+            ))
+        self._assert_query_growth('reminder_cron', *queries)
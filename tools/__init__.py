@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+from . import access_tokens
+from . import instrumentation
+from . import metrics
+from . import profiling
+from . import streaming_export
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Signed attendee, calendar feed and warm-up tokens and throttling of failed attempts
+
+Tokens are an HMAC of the order or partner id, or of the warmed sale start,
+keyed with the database secret, so a token can be checked without reading the
+record. Failed attempts are counted per client address in each worker process.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from odoo.tools import consteq
+from odoo.tools.misc import hmac
+
+_HMAC_SCOPE = 'website_event_ticket_store.attendee_access'
+_FEED_HMAC_SCOPE = 'website_event_ticket_store.registrations_feed'
+_WARMUP_HMAC_SCOPE = 'website_event_ticket_store.presale_warmup'
+# Tokens generated before signed tokens were introduced
+LEGACY_TOKEN_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$')
+
+# Failed attempts tolerated per client address within the window (seconds)
+MAX_FAILURES = 10
+FAILURE_WINDOW = 600
+# Addresses tracked before stale entries are swept
+MAX_TRACKED_ADDRESSES = 10000
+
+_failures_lock = threading.Lock()
+_failures = {}
+
+
+def sign_attendee_token(env, order_id):
+    """Return the attendee access token of an order"""
+    return hmac(env(su=True), _HMAC_SCOPE, order_id)
+
+
+def check_attendee_token(env, order_id, token):
+    """Check a signed token without reading the order"""
+    return bool(token) and consteq(token, sign_attendee_token(env, order_id))
+
+
+def sign_registrations_feed_token(env, partner_id):
+    """Return the token of a partner's registrations calendar feed"""
+    return hmac(env(su=True), _FEED_HMAC_SCOPE, partner_id)
+
+
+def check_registrations_feed_token(env, partner_id, token):
+    """Check a calendar feed token without reading the partner"""
+    return bool(token) and consteq(token, sign_registrations_feed_token(env, partner_id))
+
+
+def sign_warmup_token(env, sale_start):
+    """Return the token letting a warm-up request render the store as of ``sale_start``"""
+    timestamp = str(int(sale_start.replace(tzinfo=timezone.utc).timestamp()))
+    return f'{timestamp}.{hmac(env(su=True), _WARMUP_HMAC_SCOPE, timestamp)}'
+
+
+def check_warmup_token(env, token):
+    """Return the naive UTC sale start of a valid warm-up token, or None"""
+    timestamp, __, signature = (token or '').partition('.')
+    if not timestamp.isdigit() or not consteq(signature, hmac(env(su=True), _WARMUP_HMAC_SCOPE, timestamp)):
+        return None
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).replace(tzinfo=None)
+
+
+def is_legacy_token(token):
+    return bool(LEGACY_TOKEN_PATTERN.match(token or ''))
+
+
+def _prune(attempts, now):
+    while attempts and attempts[0] < now - FAILURE_WINDOW:
+        attempts.popleft()
+
+
+def is_rate_limited(address):
+    """Whether the address exceeded its failed attempts for the current window"""
+    now = time.monotonic()
+    with _failures_lock:
+        attempts = _failures.get(address)
+        if not attempts:
+            return False
+        _prune(attempts, now)
+        if not attempts:
+            del _failures[address]
+            return False
+        return len(attempts) >= MAX_FAILURES
+
+
+def register_failure(address):
+    now = time.monotonic()
+    with _failures_lock:
+        if len(_failures) >= MAX_TRACKED_ADDRESSES:
+            for tracked_address, attempts in list(_failures.items()):
+                _prune(attempts, now)
+                if not attempts:
+                    del _failures[tracked_address]
+        attempts = _failures.setdefault(address, deque())
+        _prune(attempts, now)
+        attempts.append(now)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Flash-sale load harness for the website event ticket store
+
+Drives a running Odoo instance with many concurrent HTTP sessions racing for
+the seats of one ticket. Each session logs in as its own portal user, adds the
+event product to its cart, pays with the demo payment provider and submits the
+attendee form. It then reports per-step latency percentiles, server-side
+serialization-failure retries and the number of seats sold beyond ``seats_max``.
+
+Example::
+
+    python3 tools/flash_sale_load.py --url http://localhost:8069 --db shop \\
+        --admin-password admin --product-id 42 --provider-id 7 \\
+        --payment-method-id 3 --sessions 300 --odoo-log /var/log/odoo.log
+
+The demo provider comes from the ``payment_demo`` module. Portal users are
+provisioned on first run through XML-RPC with the admin credentials.
+Only use this against disposable databases.
+"""
+
+import argparse
+import re
+import statistics
+import threading
+import time
+import xmlrpc.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+STEPS = ('login', 'add_to_cart', 'payment_page', 'pay', 'validate', 'attendee_post')
+RETRY_LOG_PATTERN = re.compile(r'tries left, try again')
+
+
+class Harness:
+
+    def __init__(self, args):
+        self.args = args
+        self.url = args.url.rstrip('/')
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.barrier = threading.Barrier(args.sessions)
+        self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object', allow_none=True)
+        common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
+        self.admin_uid = common.authenticate(args.db, args.admin_login, args.admin_password, {})
+
+    # ------------------------------------------------------------
+    # Admin helpers (XML-RPC)
+    # ------------------------------------------------------------
+
+    def execute(self, model, method, *args, **kwargs):
+        return self.models.execute_kw(
+            self.args.db, self.admin_uid, self.args.admin_password, model, method, list(args), kwargs,
+        )
+
+    def provision_users(self):
+        """Create one portal user with a complete address per session"""
+        logins = [f'{self.args.user_prefix}{index}@example.com' for index in range(self.args.sessions)]
+        existing = {
+            user['login'] for user in self.execute(
+                'res.users', 'search_read', [('login', 'in', logins)], fields=['login'],
+            )
+        }
+        portal_group = self.execute('ir.model.data', 'check_object_reference', 'base', 'group_portal')[1]
+        country = self.execute('res.country', 'search', [('code', '=', 'US')], limit=1)
+        state = self.execute('res.country.state', 'search', [('country_id', 'in', country)], limit=1)
+        for login in logins:
+            if login in existing:
+                continue
+            self.execute('res.users', 'create', {
+                'name': login.split('@')[0],
+                'login': login,
+                'email': login,
+                'password': self.args.user_password,
+                'groups_id': [(6, 0, [portal_group])],
+                'street': '1 Load Test Street',
+                'city': 'Loadville',
+                'zip': '10001',
+                'country_id': country[0] if country else False,
+                'state_id': state[0] if state else False,
+                'phone': '+1 555 0100',
+            })
+        return logins
+
+    def get_ticket(self):
+        product = self.execute('product.product', 'read', [self.args.product_id], fields=['event_ticket_id'])[0]
+        if not product['event_ticket_id']:
+            raise SystemExit(f'Product {self.args.product_id} has no event ticket')
+        return self.execute(
+            'event.event.ticket', 'read', [product['event_ticket_id'][0]],
+            fields=['name', 'seats_max', 'seats_limited', 'seats_available'],
+        )[0]
+
+    def count_sold_seats(self, ticket_id):
+        """Seats paid for, whether or not the attendee details were submitted"""
+        lines = self.execute(
+            'sale.order.line', 'search_read',
+            [('event_ticket_id', '=', ticket_id), ('order_id.transaction_ids.state', 'in', ['done', 'authorized'])],
+            fields=['product_uom_qty'],
+        )
+        return int(sum(line['product_uom_qty'] for line in lines))
+
+    # ------------------------------------------------------------
+    # Session flow (HTTP)
+    # ------------------------------------------------------------
+
+    def timed(self, step, func):
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            with self.lock:
+                self.latencies[step].append(time.perf_counter() - start)
+
+    def json_call(self, session, route, params):
+        response = session.post(
+            f'{self.url}{route}',
+            json={'jsonrpc': '2.0', 'method': 'call', 'params': params},
+            timeout=self.args.timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('error'):
+            raise RuntimeError(payload['error'].get('data', {}).get('message') or payload['error'])
+        return payload.get('result')
+
+    def run_session(self, login):
+        session = requests.Session()
+        step = 'login'
+        try:
+            self.timed(step, lambda: self.json_call(session, '/web/session/authenticate', {
+                'db': self.args.db, 'login': login, 'password': self.args.user_password,
+            }))
+            # Start all sessions together to reproduce the on-sale moment
+            self.barrier.wait()
+
+            step = 'add_to_cart'
+            self.timed(step, lambda: self.json_call(session, '/shop/cart/update_json', {
+                'product_id': self.args.product_id, 'add_qty': 1,
+            }))
+
+            step = 'payment_page'
+            page = self.timed(step, lambda: session.get(f'{self.url}/shop/payment', timeout=self.args.timeout))
+            order_match = re.search(r'/shop/payment/transaction/(\d+)', page.text)
+            token_match = re.search(r'data-access-token="([^"]+)"', page.text)
+            amount_match = re.search(r'data-amount="([\d.]+)"', page.text)
+            if not (order_match and token_match):
+                raise RuntimeError('payment form not found')
+
+            step = 'pay'
+
+            def pay():
+                processing_values = self.json_call(
+                    session, f'/shop/payment/transaction/{order_match.group(1)}', {
+                        'provider_id': self.args.provider_id,
+                        'payment_method_id': self.args.payment_method_id,
+                        'token_id': None,
+                        'amount': float(amount_match.group(1)) if amount_match else None,
+                        'flow': 'direct',
+                        'tokenization_requested': False,
+                        'landing_route': '/shop/payment/validate',
+                        'is_validation': False,
+                        'access_token': token_match.group(1),
+                    },
+                )
+                self.json_call(session, '/payment/demo/simulate_payment', {
+                    'reference': processing_values['reference'],
+                    'payment_details': '4242',
+                    'simulated_state': 'done',
+                })
+                self.json_call(session, '/payment/status/poll', {})
+            self.timed(step, pay)
+
+            step = 'validate'
+            response = self.timed(step, lambda: session.get(
+                f'{self.url}/shop/payment/validate', timeout=self.args.timeout,
+            ))
+            if '/attendee-details/' not in response.url:
+                raise RuntimeError(f'not redirected to attendee details: {response.url}')
+
+            step = 'attendee_post'
+            self.timed(step, lambda: session.post(
+                response.url, data=self.attendee_form_data(response.text), timeout=self.args.timeout,
+            ).raise_for_status())
+        except Exception as error:  # noqa: BLE001 - every failure is reported per step
+            with self.lock:
+                self.errors[(step, str(error)[:120])] += 1
+            if step == 'login' and not self.barrier.broken:
+                # Still release the other sessions waiting for the on-sale moment
+                try:
+                    self.barrier.wait()
+                except threading.BrokenBarrierError:
+                    pass
+
+    @staticmethod
+    def attendee_form_data(html):
+        data = dict(re.findall(r'name="(\d+-(?:event_ticket_id|sale_order_line_id))"\s+value="(\d+)"', html))
+        for counter in {key.split('-')[0] for key in data}:
+            data.update({
+                f'{counter}-name': f'Load Attendee {counter}',
+                f'{counter}-email': f'load.attendee.{counter}@example.com',
+            })
+        for name, question_type in re.findall(r'name="(\d+-(name|email|phone|company_name)-\d+)"', html):
+            data[name] = 'load.attendee@example.com' if question_type == 'email' else f'Load {question_type}'
+        return data
+
+    # ------------------------------------------------------------
+    # Run and report
+    # ------------------------------------------------------------
+
+    def count_server_retries(self, log_offset):
+        if not self.args.odoo_log:
+            return None
+        with open(self.args.odoo_log, errors='replace') as log_file:
+            log_file.seek(log_offset)
+            return sum(1 for line in log_file if RETRY_LOG_PATTERN.search(line))
+
+    def run(self):
+        logins = self.provision_users()
+        ticket = self.get_ticket()
+        sold_before = self.count_sold_seats(ticket['id'])
+        log_offset = 0
+        if self.args.odoo_log:
+            with open(self.args.odoo_log, errors='replace') as log_file:
+                log_offset = log_file.seek(0, 2)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.sessions) as executor:
+            list(executor.map(self.run_session, logins))
+        duration = time.perf_counter() - start
+
+        sold = self.count_sold_seats(ticket['id'])
+        retries = self.count_server_retries(log_offset)
+        self.report(ticket, sold_before, sold, retries, duration)
+
+    def report(self, ticket, sold_before, sold, retries, duration):
+        print(f"\nTicket {ticket['name']} (id {ticket['id']}): seats_max={ticket['seats_max']}, "
+              f"sessions={self.args.sessions}, duration={duration:.1f}s")
+        print(f"{'step':<15}{'count':>7}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}")
+        for step in STEPS:
+            values = sorted(self.latencies.get(step, []))
+            if not values:
+                continue
+            quantiles = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+            print(f'{step:<15}{len(values):>7}{quantiles[49]:>10.3f}{quantiles[94]:>10.3f}{quantiles[98]:>10.3f}')
+
+        print('\nErrors:' if self.errors else '\nErrors: none')
+        for (step, message), count in sorted(self.errors.items(), key=lambda item: -item[1]):
+            print(f'  {count:>5} x {step}: {message}')
+
+        print(f"\nServer serialization-failure retries: {'n/a (no --odoo-log)' if retries is None else retries}")
+        print(f'Seats sold during run: {sold - sold_before} (total {sold})')
+        if ticket['seats_limited']:
+            print(f"Seats sold beyond seats_max: {max(0, sold - ticket['seats_max'])}")
+        else:
+            print('Ticket has unlimited seats: oversell cannot occur')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--admin-login', default='admin')
+    parser.add_argument('--admin-password', required=True)
+    parser.add_argument('--product-id', type=int, required=True, help='event product.product to buy')
+    parser.add_argument('--provider-id', type=int, required=True, help='demo payment.provider id')
+    parser.add_argument('--payment-method-id', type=int, required=True, help='payment.method id of the demo provider')
+    parser.add_argument('--sessions', type=int, default=100, help='number of concurrent buyers')
+    parser.add_argument('--user-prefix', default='flash.sale.')
+    parser.add_argument('--user-password', default='flash-sale-load')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--odoo-log', help='server log file, to count serialization-failure retries')
+    Harness(parser.parse_args()).run()
+
+
+if __name__ == '__main__':
+    main()
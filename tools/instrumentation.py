@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Switchable timing and query-count spans around the store's hot paths
+
+Spans are aggregated in memory, per worker process and per database. When the
+``website_event_ticket_store.instrumentation`` system parameter is not set,
+a span costs one ormcached parameter lookup.
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from odoo.http import request
+
+INSTRUMENTATION_PARAM = 'website_event_ticket_store.instrumentation'
+
+_stats_lock = threading.Lock()
+# {dbname: {operation: {'count', 'duration', 'max_duration', 'queries', 'records'}}}
+_stats = {}
+
+
+class StoreSpan:
+    """Mutable handle given to instrumented code to report processed records"""
+    __slots__ = ('records',)
+
+    def __init__(self):
+        self.records = 0
+
+
+def is_instrumentation_enabled(env):
+    return bool(env['ir.config_parameter'].sudo().get_param(INSTRUMENTATION_PARAM))
+
+
+@contextmanager
+def store_span(env, operation):
+    """Measure duration and SQL queries of the wrapped block when enabled"""
+    if not is_instrumentation_enabled(env):
+        yield StoreSpan()
+        return
+
+    span = StoreSpan()
+    query_count = env.cr.sql_log_count
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        duration = time.perf_counter() - start
+        queries = env.cr.sql_log_count - query_count
+        with _stats_lock:
+            stats = _stats.setdefault(env.cr.dbname, {}).setdefault(operation, {
+                'count': 0, 'duration': 0.0, 'max_duration': 0.0, 'queries': 0, 'records': 0,
+            })
+            stats['count'] += 1
+            stats['duration'] += duration
+            stats['max_duration'] = max(stats['max_duration'], duration)
+            stats['queries'] += queries
+            stats['records'] += span.records
+
+
+def instrumented(operation, records=None):
+    """Decorate a model method so each call is recorded as a store span
+
+    :param records: optional callable ``(self, result) -> int`` returning the
+        number of records processed by the call, defaults to ``len(self)``
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with store_span(self.env, operation) as span:
+                result = method(self, *args, **kwargs)
+                span.records += records(self, result) if records else len(self)
+            return result
+        return wrapper
+    return decorator
+
+
+def instrumented_route(operation):
+    """Decorate a controller method so each call is recorded as a store span"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with store_span(request.env, operation):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_store_stats(dbname):
+    """Return a copy of the aggregated spans of this worker for a database"""
+    with _stats_lock:
+        return {operation: dict(stats) for operation, stats in _stats.get(dbname, {}).items()}
+
+
+def reset_store_stats(dbname):
+    with _stats_lock:
+        _stats.pop(dbname, None)
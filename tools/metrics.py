@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""In-memory Prometheus-style metrics of the ticket store
+
+Values are aggregated per worker process and rendered in the text exposition
+format without touching the database, so scraping costs no ORM query. Every
+sample carries a ``worker`` label holding the process id, so the series of
+prefork workers stay apart and are summed on the monitoring side.
+
+Scrapes must present the token set by ``event_ticket_store_metrics_token`` in
+the server configuration file.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+from odoo.tools import config, consteq
+
+_lock = threading.Lock()
+_registry = []
+
+# Server configuration option holding the token required to scrape the metrics
+METRICS_TOKEN_OPTION = 'event_ticket_store_metrics_token'
+
+
+def _format_labels(labels):
+    # Read at render time, as workers are forked after the module is imported
+    labels = tuple(labels) + (('worker', os.getpid()),)
+    return '{%s}' % ','.join('%s="%s"' % (name, str(value).replace('"', '\\"')) for name, value in labels)
+
+
+class Counter:
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(labels)} {value}')
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        _registry.append(self)
+
+    def observe(self, value):
+        with _lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self._counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(float(bound))
+            lines.append(f'{self.name}_bucket{_format_labels([("le", le)])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(())} {self._sum}')
+        lines.append(f'{self.name}_count{_format_labels(())} {cumulative}')
+        return lines
+
+
+def is_scrape_authorized(authorization):
+    """Whether an Authorization header carries the configured scrape token
+
+    Scraping is refused while no token is configured.
+    """
+    token = config.get(METRICS_TOKEN_OPTION)
+    return bool(token) and consteq(authorization or '', f'Bearer {token}')
+
+
+def render_metrics():
+    """Return all metrics of this worker in the text exposition format"""
+    with _lock:
+        lines = [line for metric in _registry for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+CART_REJECTIONS = Counter(
+    'event_ticket_store_cart_rejections_total',
+    'Event products refused when added to the cart, by reason.',
+)
+REMINDERS_SENT = Counter(
+    'event_ticket_store_attendee_reminders_sent_total',
+    'Attendee details reminder emails sent or queued.',
+)
+ORDERS_HELD = Counter(
+    'event_ticket_store_orders_held_total',
+    'Paid event orders held until their attendee details are submitted.',
+)
+ATTENDEE_COMPLETIONS = Counter(
+    'event_ticket_store_attendee_completions_total',
+    'Event orders whose attendee details were submitted.',
+)
+CARTS_REAPED = Counter(
+    'event_ticket_store_carts_reaped_total',
+    'Unpaid event carts cancelled by the reaper, by reason.',
+)
+PAYMENT_TO_ATTENDEE_SECONDS = Histogram(
+    'event_ticket_store_payment_to_attendee_seconds',
+    'Time between payment and attendee details submission.',
+    buckets=(60, 300, 900, 3600, 4 * 3600, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600),
+)
+ATTENDEE_POST_SECONDS = Histogram(
+    'event_ticket_store_attendee_post_seconds',
+    'Duration of the attendee details form submission.',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""On-demand profiling of the store's controller routes
+
+A route decorated with ``profiled_route`` runs inside Odoo's profiler (SQL
+queries and sampled stack traces) when either:
+
+* the ``website_event_ticket_store.profiler_sample_rate`` system parameter is
+  set to a fraction between 0 and 1 and the request is sampled, or
+* the request carries a valid ``X-Event-Ticket-Store-Profile`` header issued
+  by an administrator with ``issue_profiling_token``.
+
+Profiles are stored as ``ir.profile`` records named after the route and the
+order. Each worker profiles at most
+``website_event_ticket_store.profiler_max_per_minute`` requests per minute and
+one request at a time, so the switch can stay on under load.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from odoo import _
+from odoo.exceptions import AccessError
+from odoo.http import request
+from odoo.tools import consteq
+from odoo.tools.misc import hmac
+from odoo.tools.profiler import Profiler
+
+_logger = logging.getLogger(__name__)
+
+PROFILER_SAMPLE_RATE_PARAM = 'website_event_ticket_store.profiler_sample_rate'
+PROFILER_MAX_PER_MINUTE_PARAM = 'website_event_ticket_store.profiler_max_per_minute'
+PROFILER_HEADER = 'X-Event-Ticket-Store-Profile'
+PROFILER_SESSION = 'website_event_ticket_store'
+DEFAULT_MAX_PER_MINUTE = 6
+# Seconds between two stack samples of the traces collector
+TRACES_INTERVAL = 0.01
+
+_HMAC_SCOPE = 'website_event_ticket_store.profiler'
+
+_budget_lock = threading.Lock()
+_recent_profiles = deque()
+_active_profile = threading.Lock()
+
+
+def issue_profiling_token(env, lifetime=3600):
+    """Return a header value enabling profiling of the store routes until it expires"""
+    if not env.user._is_system():
+        raise AccessError(_("Only administrators can issue profiling tokens."))
+    expiry = str(int(time.time()) + lifetime)
+    return f'{expiry}.{hmac(env(su=True), _HMAC_SCOPE, expiry)}'
+
+
+def _check_profiling_token(env, token):
+    expiry, __, signature = (token or '').partition('.')
+    if not expiry.isdigit() or int(expiry) < time.time():
+        return False
+    return consteq(signature, hmac(env(su=True), _HMAC_SCOPE, expiry))
+
+
+def _should_profile(env):
+    """Decide whether the current request is profiled, before any budget check"""
+    if request.session.get('profile_session'):
+        # Odoo's own profiler already covers the whole request
+        return False
+    header = request.httprequest.headers.get(PROFILER_HEADER)
+    if header:
+        return _check_profiling_token(env, header)
+    try:
+        sample_rate = float(env['ir.config_parameter'].sudo().get_param(PROFILER_SAMPLE_RATE_PARAM) or 0)
+    except ValueError:
+        return False
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def _acquire_budget(env):
+    """Reserve one profile in this worker's per-minute budget"""
+    try:
+        max_per_minute = int(env['ir.config_parameter'].sudo().get_param(
+            PROFILER_MAX_PER_MINUTE_PARAM, DEFAULT_MAX_PER_MINUTE,
+        ))
+    except ValueError:
+        max_per_minute = DEFAULT_MAX_PER_MINUTE
+    now = time.monotonic()
+    with _budget_lock:
+        while _recent_profiles and _recent_profiles[0] < now - 60:
+            _recent_profiles.popleft()
+        if len(_recent_profiles) >= max_per_minute:
+            return False
+        _recent_profiles.append(now)
+        return True
+
+
+def _get_order_id(kwargs):
+    return (
+        kwargs.get('order_id')
+        or kwargs.get('sale_order_id')
+        or request.session.get('sale_order_id')
+        or request.session.get('sale_last_order_id')
+    )
+
+
+def profiled_route(route_name):
+    """Decorate a controller method so sampled requests run in Odoo's profiler"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            env = request.env
+            if not _should_profile(env) or not _active_profile.acquire(blocking=False):
+                return method(self, *args, **kwargs)
+            try:
+                if not _acquire_budget(env):
+                    return method(self, *args, **kwargs)
+                order_id = _get_order_id(kwargs)
+                description = f'{PROFILER_SESSION} {route_name} order={order_id or "-"} {request.httprequest.path}'
+                _logger.info("Profiling %s", description)
+                with Profiler(
+                    collectors=['sql', 'traces_async'],
+                    db=env.cr.dbname,
+                    description=description,
+                    profile_session=PROFILER_SESSION,
+                    params={'traces_async_interval': TRACES_INTERVAL},
+                ):
+                    return method(self, *args, **kwargs)
+            finally:
+                _active_profile.release()
+        return wrapper
+    return decorator
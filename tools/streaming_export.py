@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Incremental CSV and XLSX writers for large exports
+
+Rows are produced by a generator reading the database in batches, in a cursor
+of its own, because the request cursor is closed before a streamed response
+body is consumed.
+"""
+
+import csv
+import io
+import re
+import tempfile
+
+import xlsxwriter
+
+from odoo import api
+from odoo.modules.registry import Registry
+
+# Bytes buffered before a chunk of the response is sent
+CHUNK_SIZE = 64 * 1024
+# Characters Excel refuses in worksheet names, and its name length limit
+INVALID_SHEET_NAME_CHARS = re.compile(r'[\[\]:*?/\\]')
+MAX_SHEET_NAME_LENGTH = 31
+
+
+def rows_in_new_cursor(dbname, uid, context, rows_factory):
+    """Yield the rows of ``rows_factory(env)`` read in a dedicated cursor"""
+    with Registry(dbname).cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        yield from rows_factory(env)
+
+
+def csv_chunks(rows):
+    """Encode rows as UTF-8 CSV, yielding chunks of about CHUNK_SIZE bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ics_escape(value):
+    """Escape a TEXT property value of an iCalendar line"""
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def ics_chunks(lines):
+    """Encode unfolded iCalendar lines, folding them at 75 octets with CRLF ends"""
+    buffer = io.BytesIO()
+    for line in lines:
+        encoded = line.encode()
+        # Continuation lines start with a space, leaving them 74 octets of content
+        limit = 75
+        while len(encoded) > limit:
+            cut = limit
+            # Never split a multi-byte UTF-8 character
+            while (encoded[cut] & 0xC0) == 0x80:
+                cut -= 1
+            buffer.write(encoded[:cut] + b'\r\n ')
+            encoded = encoded[cut:]
+            limit = 74
+        buffer.write(encoded + b'\r\n')
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def xlsx_sheet_name(name):
+    """Return a valid worksheet name for ``name``, e.g. an event name"""
+    # Names cannot start or end with an apostrophe either
+    name = INVALID_SHEET_NAME_CHARS.sub('-', name or '')[:MAX_SHEET_NAME_LENGTH].strip("' ")
+    return name or 'Sheet1'
+
+
+def xlsx_chunks(rows, sheet_name):
+    """Write rows to an XLSX workbook and yield it in chunks of CHUNK_SIZE bytes
+
+    Rows are flushed to disk as they are written, so memory does not grow
+    with the number of rows. The workbook can only be sent once complete.
+    """
+    with tempfile.TemporaryFile() as output:
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet(xlsx_sheet_name(sheet_name))
+        header_format = workbook.add_format({'bold': True})
+        for row_index, row in enumerate(rows):
+            worksheet.write_row(row_index, 0, row, header_format if row_index == 0 else None)
+        workbook.close()
+
+        output.seek(0)
+        while chunk := output.read(CHUNK_SIZE):
+            yield chunk